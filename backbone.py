@@ -0,0 +1,48 @@
+from model_counting import cofactors, node_level, postorder
+
+# Backbone of a BDD: the literals that hold in every model.
+# One top-down pass over the nodes, no counting. Every node of a reduced BDD except false reaches true, so
+# every edge into a node other than false lies on a path to true. The variable of a node can take the value
+# of every such edge, and the variables that an edge skips can take both values. A variable of the support
+# that only ever takes one value is in the backbone. The variables outside the support are free.
+
+
+# Returns {var: value} for every variable of the support of u that has the same value in all models of u
+def backbone(bdd, u, nodes=None):
+    if u == bdd.false:
+        return {}
+    levels = {bdd.level_of_var(var): var for var in bdd.vars}
+    nvars = len(levels)
+
+    if nodes is None:
+        nodes = postorder(bdd, u)
+
+    positive = [False] * nvars
+    negative = [False] * nvars
+    # free[l] > 0 when an edge skips level l; stored as a difference array over the levels
+    free = [0] * (nvars + 1)
+    root_level = node_level(u, nvars)
+    if root_level > 0:
+        free[0] += 1
+        free[root_level] -= 1
+
+    for node in nodes:
+        if node.var is None:
+            continue
+        level = node.level
+        for child, side in zip(cofactors(node), (negative, positive)):
+            if child == bdd.false:
+                continue
+            side[level] = True
+            child_level = node_level(child, nvars)
+            if child_level > level + 1:
+                free[level + 1] += 1
+                free[child_level] -= 1
+
+    result = {}
+    running = 0
+    for level in range(nvars):
+        running += free[level]
+        if running == 0 and positive[level] != negative[level]:
+            result[levels[level]] = positive[level]
+    return result
@@ -0,0 +1,194 @@
+import csv
+import multiprocessing
+import os
+import resource
+import sys
+import traceback
+from time import sleep, time
+
+from instrumentation import cudd_statistics
+
+# Batch runner for directory sweeps.
+# A job is one (workload, file, option) triple, for example ('configure', 'busybox.dimacs', 'c'). Every job
+# runs in its own process, so every job gets its own BDD manager (a CUDD manager is single threaded), and
+# at most `processes` of them run at the same time. A job that passes its timeout is killed, its memory
+# cap is an address space limit set inside the process. The results end up in one table, with the peak
+# resident memory of the job and the peak node and reordering counts of its BDD manager.
+# A runner returns its result text and its BDD manager (None for the workloads without one).
+#   count:     k-colorings of a .col graph with a counting mode of naive_approach, option = mode
+#   coloring:  coloring BDD of bdd_approach at the heuristic upper bound, option = encoding
+#   configure: configurator of problem2, option = one of decisions.STRATEGIES, writes to CONFIGURE_OUTPUT
+#   trace:     path checks of problem3, option unused
+
+WORKLOADS = ['count', 'coloring', 'configure', 'trace']
+# The configure jobs write their configurations here instead of over the tracked results of problem2
+CONFIGURE_OUTPUT = 'batch_output'
+COLUMNS = ['workload', 'file', 'option', 'status', 'seconds', 'result', 'peak_rss_mb', 'peak_nodes', 'reorderings']
+
+
+# The DIMACS files of a directory, without hidden entries and subdirectories
+def list_inputs(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if not name.startswith('.') and os.path.isfile(os.path.join(directory, name)))
+
+
+def run_count(f, option):
+    from naive_approach import parse_dimacs
+    graph = parse_dimacs(f)
+    lower, upper = graph.coloring_bounds()
+    count = {'polynomial': graph.total_memory_k_colorings,
+             'treewidth': graph.total_treewidth_k_colorings,
+             'bitset': graph.total_bitset_k_colorings}[option]
+    return f'{upper}-colorings: {count(upper)}', None
+
+
+def run_coloring(f, option):
+    from bdd_approach import create_bdd, create_bit_encoded_bdd, parse_dimacs
+    graph = parse_dimacs(f)
+    _, upper = graph.coloring_bounds()
+    build = create_bdd if option == 'one_hot' else create_bit_encoded_bdd
+    bdd, result = build(f, upper)
+    return f'k: {upper}, size: {len(result)}', bdd
+
+
+def run_configure(f, option):
+    from dd.cudd import BDD
+    from problem2 import parse_dimacs, print_choice
+    # the workers of one file share one build: the first builds it under the lock of its bdd_cache entry,
+    # the others wait and load it
+    bdd, expressions, vo = parse_dimacs(f, BDD(), cache=True)
+    _, (added, negated_added) = print_choice(option, os.path.basename(f), bdd, expressions, vo,
+                                             output_dir=CONFIGURE_OUTPUT)
+    return f'positive: {added}, negative: {negated_added}', bdd
+
+
+def run_trace(f, option):
+    from problem3 import check_path, create_bdd, parse_dimacs
+    graph, paths = parse_dimacs(f)
+    bdd, result = create_bdd(graph)
+    return f'{check_path(bdd, result, paths, graph.V)}/{len(paths)} paths possible', bdd
+
+
+RUNNERS = {
+    'count': run_count,
+    'coloring': run_coloring,
+    'configure': run_configure,
+    'trace': run_trace,
+}
+
+
+# Peak resident memory of this process and the peak nodes and reorderings of a BDD manager
+def job_metrics(bdd):
+    metrics = {'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    if bdd is not None:
+        stats = cudd_statistics(bdd)
+        metrics['peak_nodes'] = stats['peak_nodes']
+        metrics['reorderings'] = stats['n_reorderings']
+    return metrics
+
+
+# Body of a worker process, sends (status, result, metrics) back through the pipe
+def work(connection, workload, f, option, memory_cap, quiet):
+    if memory_cap is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_cap, memory_cap))
+    if quiet:
+        # the progress bars of tqdm go to stderr, the error of a failed job is sent back as its result
+        sys.stdout = sys.stderr = open(os.devnull, 'w')
+    try:
+        result, bdd = RUNNERS[workload](f, option)
+        connection.send(('ok', result, job_metrics(bdd)))
+    except MemoryError:
+        connection.send(('memory', 'memory cap reached', job_metrics(None)))
+    except Exception as error:
+        traceback.print_exc()
+        connection.send(('error', repr(error), job_metrics(None)))
+    connection.close()
+
+
+class BatchRunner:
+    def __init__(self, processes=None, timeout=None, memory_cap=None, quiet=True):
+        self.processes = processes or os.cpu_count() or 1
+        # seconds per job and bytes of address space per job, None for no limit
+        self.timeout = timeout
+        self.memory_cap = memory_cap
+        self.quiet = quiet
+        self.results = []
+
+    def start(self, job):
+        workload, f, option = job
+        if workload not in RUNNERS:
+            raise ValueError(f"Unknown workload '{workload}', choose one of {WORKLOADS}")
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=work,
+                                          args=(sender, workload, f, option, self.memory_cap, self.quiet))
+        process.start()
+        sender.close()
+        return process, receiver, time()
+
+    def finish(self, job, process, receiver, started, status=None, result=''):
+        metrics = {}
+        if status is None:
+            # read before joining, a large answer would block the process in send
+            try:
+                status, result, metrics = receiver.recv()
+            except EOFError:
+                # the process died without an answer, CUDD aborts when it cannot allocate
+                status, result = 'crashed', f'exit code {process.exitcode}'
+        process.join()
+        receiver.close()
+        workload, f, option = job
+        row = {'workload': workload, 'file': os.path.basename(f), 'option': option, 'status': status,
+               'seconds': round(time() - started, 3), 'result': result}
+        row.update(metrics)
+        self.results.append(row)
+        print(format_row(row))
+
+    # Runs all jobs, returns the rows of the result table in the order in which the jobs finished
+    def run(self, jobs):
+        pending = list(jobs)
+        running = []
+        while pending or running:
+            while pending and len(running) < self.processes:
+                job = pending.pop(0)
+                running.append((job, *self.start(job)))
+            for entry in list(running):
+                job, process, receiver, started = entry
+                if receiver.poll() or not process.is_alive():
+                    running.remove(entry)
+                    self.finish(job, process, receiver, started)
+                elif self.timeout is not None and time() - started > self.timeout:
+                    process.kill()
+                    running.remove(entry)
+                    self.finish(job, process, receiver, started, 'timeout', f'killed after {self.timeout} s')
+            sleep(0.05)
+        return self.results
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS, restval='')
+            writer.writeheader()
+            writer.writerows(self.results)
+
+
+def format_row(row):
+    return (f"{row['workload']:<10} {row['file']:<20} {str(row['option']):<11} {row['status']:<8} "
+            f"{row['seconds']:>9} {row['result']}")
+
+
+# Every (workload, file, option) job of a directory sweep, or of a single file
+def jobs_for(workload, directory, options):
+    inputs = [directory] if os.path.isfile(directory) else list_inputs(directory)
+    return [(workload, f, option) for f in inputs for option in options]
+
+
+if __name__ == '__main__':
+    # Jobs: every strategy of the configurator on all feature models, and the counts of the less-dimacs graphs
+    jobs = jobs_for('configure', os.path.join('data', 'feature-dimacs'), ['a', 'b', 'c', 'd'])
+    jobs += jobs_for('count', os.path.join('data', 'less-dimacs'), ['bitset'])
+
+    # One job per core, a timeout per job in seconds and an address space cap per job in bytes
+    runner = BatchRunner(processes=None, timeout=3600, memory_cap=8 * 1024 ** 3)
+
+    print(format_row({column: column for column in COLUMNS}))
+    runner.run(jobs)
+    runner.write_csv('batch_results.csv')
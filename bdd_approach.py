@@ -1,7 +1,16 @@
 import os
+from itertools import chain
 from time import time
 from dd.cudd import BDD
 
+from bdd_clauses import less_than, not_both, not_equal, one_hot
+from coloring import CSRGraph, color, color_bounds, number_of_colors
+from conjunction import conjoin
+from dimacs_cache import read_dimacs_cached
+from instrumentation import from_settings, input_file, phase
+from ordering import compute_order
+from reordering import ReorderConfig
+
 
 # Define a Graph class to represent the graph and perform coloring
 class Graph:
@@ -14,208 +23,181 @@ class Graph:
         self.graph[u].append(v)
         self.graph[v].append(u)
 
-    def greedy_coloring(self):
-        # Greedy graph coloring algorithm
-        result_colors = [-1] * self.V  # Initialize color assignments
-        result_colors[0] = 0  # Assign the first vertex the first color
-        already_colored = [False] * self.V  # Track available colors
-
-        for u in range(1, self.V):
-            for neighbor in self.graph[u]:
-                # check if neighbor is not colored
-                if result_colors[neighbor] != -1:
-                    # the neighbor should still be colored
-                    already_colored[result_colors[neighbor]] = True
-
-            node_color = 0
-            # find a node that is not colored yet
-            while node_color < self.V:
-                if not already_colored[node_color]:
-                    # we found one that is not yet colored, so this is the number of the next color
-                    break
-                node_color += 1
-
-            result_colors[u] = node_color  # Assign the minimum available color
-            for neighbor in self.graph[u]:
-                # say that the neighbors without colors should still be colored
-                if result_colors[neighbor] != -1:
-                    already_colored[result_colors[neighbor]] = False
+    def greedy_coloring(self, order='natural'):
+        # Number of colors of a greedy coloring, by default in the order 0..V-1 (see coloring.ORDERS)
+        return number_of_colors(color(CSRGraph(self.graph), order))
 
-        return max(result_colors) + 1  # Return the total number of colors used
+    def coloring_bounds(self, time_budget=1.0):
+        # (lower, upper) bound on the number of colors: a clique and the best heuristic coloring
+        lower, upper, _ = color_bounds(self.graph, time_budget)
+        return lower, upper
 
 
 # Function to parse the DIMACS graph file
 def parse_dimacs(f):
-    with open(f, 'r') as file:
-        lines = file.readlines()
-
-    vertices = None
-    edges = []
-
-    for line in lines:
-        if line.startswith('c'):
-            # Ignore comments
-            continue
-        elif line.startswith('p'):
-            vertices = int(line.split()[2])
-        elif line.startswith('e'):
-            _, u, v = line.strip().split()
-            edges.append((int(u) - 1, int(v) - 1))
+    dimacs = read_dimacs_cached(f)
 
-    if vertices is None:
-        raise ValueError("No 'p' line found in the DIMACS file.")
-
-    g = Graph(vertices)
-    for u, v in edges:
+    g = Graph(dimacs.V)
+    for u, v in dimacs.iter_edges():
         g.add_edge(u, v)  # Add edges to the graph
     return g
 
 
-def create_bdd(f, color_nr):
+def create_bdd(f, color_nr, strategy='linear', ordering=None, reordering=None, symmetry=None,
+               instrumentation=None):
     bdd = BDD()
-    result = bdd.true
-
-    with open(f, 'r') as file:
-        lines = file.readlines()
-
-    vars = []
-
-    # Loop over the input file lines
-    for line in lines:
-        if line.startswith('c'):
-            # Ignore comments
-            continue
-        elif line.startswith('p'):
-            # Ignore describing line
-            continue
-        elif line.startswith('e'):
-            _, u, v = line.strip().split()
-            # Add to variables list, add clause that two vertices may not be the same color
-            clause = []
+    if reordering is not None:
+        reordering.setup(bdd)
+
+    with phase(instrumentation, 'parse'):
+        dimacs = read_dimacs_cached(f)
+
+    with phase(instrumentation, 'variables', bdd):
+        # Declare the variables up front in a static ordering, the colors of a vertex stay next to each other.
+        # Without an ordering they are declared in the order in which the edges mention them.
+        if ordering is not None:
+            used = set(dimacs.edges)
+            blocks = []
+            for vertex in compute_order(dimacs, ordering):
+                if vertex in used:
+                    blocks.append([f'x_{vertex + 1}_{i}' for i in range(color_nr)])
+                    for var in blocks[-1]:
+                        bdd.add_var(var)
+            # Let sifting move the colors of a vertex as one block
+            if reordering is not None:
+                reordering.group_blocks(bdd, blocks)
+
+        vars = []
+
+        # Loop over the edges, the variable names use the 1-based vertex numbers of the file
+        for u, v in dimacs.iter_edges():
+            u += 1
+            v += 1
+            # Add to variables list
             for i in range(color_nr):
                 vars.append(f'x_{u}_{i}')
                 vars.append(f'x_{v}_{i}')
                 bdd.add_var(f'x_{u}_{i}')
                 bdd.add_var(f'x_{v}_{i}')
 
-                c = f'(!x_{u}_{i} | !x_{v}_{i})'
-                result &= bdd.add_expr(c)
-        else:
-            raise Exception("This should not happen")
-    
-    # Sort such that we can use the list later
-    vars = sorted(set(vars))
-    
-    # Create clauses for the statement, a vertex may have only one color.
-    for i in range(0, len(vars), color_nr):
-        variable_group = vars[i:i+color_nr]
-        clause = []
-
-        # Create a clause for each combination of variables in the group
-        for j in range(color_nr):
-            variable_combo = [f"{'!' if l != j else ''}{variable}" for l, variable in enumerate(variable_group)]
-            clause.append("(" + " & ".join(variable_combo) + ")")
-
-        # Combine the individual clauses with ' | ' to ensure only one is true
-        u = bdd.false
-        for c in clause:
-            u |= bdd.add_expr(c)
-        result &= u
-
-        # c = " | ".join(clause)
-        # result &= bdd.add_expr(c)
-    
-    # print(bdd.statistics())
-    print(f'k: {color_nr}, size: {len(result)}, models: {bdd.count(result)}')
-
-
-################################################
-# non-working :)))))
-################################################          
-def create_bit_encoded_bdd(f, color_nr):
+        # Sort such that we can use the list later
+        vars = sorted(set(vars))
+
+        # Two vertices on an edge may not have the same color, and a vertex may have only one color.
+        # The clauses are built lazily, so the linear schedule conjoins every clause right after building it.
+        clauses = chain(
+            (not_both(bdd, f'x_{u + 1}_{i}', f'x_{v + 1}_{i}') for u, v in dimacs.iter_edges()
+             for i in range(color_nr)),
+            (one_hot(bdd, vars[i:i+color_nr]) for i in range(0, len(vars), color_nr)))
+
+        # Symmetry breaking constraints go first, they fix colors early and keep the intermediate BDDs small
+        if symmetry is not None:
+            blocks = {vertex: [f'x_{vertex + 1}_{i}' for i in range(color_nr)] for vertex in set(dimacs.edges)}
+            clauses = chain(symmetry.constraints(bdd, dimacs, blocks, color_nr, 'one_hot'), clauses)
+
+    # Conjoin all clauses in the order given by the strategy
+    with phase(instrumentation, 'conjoin', bdd):
+        result, stats = conjoin(bdd, clauses, strategy, reordering, instrumentation)
+    print(stats)
+    with phase(instrumentation, 'count', bdd):
+        print(f'k: {color_nr}, size: {len(result)}, models: {bdd.count(result)}')
+        if symmetry is not None:
+            print(f'k: {color_nr}, colorings: {symmetry.colorings(bdd, result, blocks, color_nr, "one_hot")}')
+    return bdd, result
+
+
+# Binary (log) encoding: every vertex gets ceil(log2 k) bits x_{v}_{j} that hold its color number,
+# x_{v}_0 is the most significant bit. Adjacent vertices need different numbers, and the codes k..2^bits-1
+# are excluded, so the models are exactly the k-colorings, as with the one-hot encoding.
+def create_bit_encoded_bdd(f, color_nr, strategy='linear', ordering=None, reordering=None, symmetry=None,
+                           instrumentation=None):
     bdd = BDD()
-
-    with open(f, 'r') as file:
-        lines = file.readlines()
-
-    # Create list of variables and clauses
-    vars = []
-    clauses = []
-    nodes = []
-    bits_needed = (color_nr-1).bit_length()
-
-    # Loop over the input file lines
-    for line in lines:
-        if line.startswith('c'):
-            # Ignore comments
-            continue
-        elif line.startswith('p'):
-            # Ignore describing line
-            continue
-        elif line.startswith('e'):
-            _, u, v = line.strip().split()
-            nodes.append(u)
-            nodes.append(v)
-            # Add to variables list, add clause that two vertices may not be the same color
-            # This time we use a bit representation for this. So we make log(color_nr) variables for each vertex, which is the
-            # nr of bits needed to represent the amount of colors.
-            for i in range(bits_needed):
-                vars.append(f'x_{u}_{i}')
-                vars.append(f'x_{v}_{i}')
-            
-            for i in range(color_nr):
-                current = bin(i)[2:]
-                current = f'{current.zfill(bits_needed)}'
-
-                for j in range(bits_needed):
-                    clauseU = []
-                    clauseV = []
-                    for nr in current:
-                        clauseU.append(f'!x_{u}_{j}' if nr=="0" else f'x_{u}_{j}')
-                        clauseV.append(f'!x_{v}_{j}' if nr=="0" else f'x_{v}_{j}')
-                clauses.append("!(" + " & ".join(clauseU) + ") | !(" + " & ".join(clauseV) + ")")
+    if reordering is not None:
+        reordering.setup(bdd)
+
+    with phase(instrumentation, 'parse'):
+        dimacs = read_dimacs_cached(f)
+    bits_needed = max(1, (color_nr - 1).bit_length())
+
+    with phase(instrumentation, 'variables', bdd):
+        # Only the vertices on an edge get variables, in the static ordering or in the order the edges mention them
+        used = set(dimacs.edges)
+        if ordering is not None:
+            vertices = [vertex for vertex in compute_order(dimacs, ordering) if vertex in used]
         else:
-            raise Exception("This should not happen")
-    
-    # Make vars a set such that no duplicates are present
-    vars = set(vars)
-    nodes = set(nodes)
-    
-    # Create clauses for the statement, a vertex may have only one color.
-    temp_vars = []
-    for node in nodes:
-        for i in range(color_nr):
-            current = bin(i)[2:]
-            current = f'{current.zfill(bits_needed)}'
-
-            for j in range(bits_needed):
-                clause = []
-                for nr in current:
-                    clause.append(f'!x_{node}_{j}' if nr=="0" else f'x_{node}_{j}')
-            temp_vars.append("(" + " & ".join(clause) + ")")
-
-    for i in range(0, len(nodes)*color_nr, color_nr):
-        variable_group = temp_vars[i:i+color_nr]
-        clause = []
-
-        # Create a clause for each combination of variables in the group
-        for j in range(color_nr):
-            variable_combo = [f"{'!' if l != j else ''}{variable}" for l, variable in enumerate(variable_group)]
-            clause.append("(" + " & ".join(variable_combo) + ")")
-
-        # Combine the individual clauses with ' | ' to ensure only one is true    
-        clauses.append(" | ".join(clause))
-    
-    # Create all BDD variables
-    [bdd.add_var(var) for var in vars]
-
-    cnf = bdd.true
-    for clause in clauses:
-        cnf &= bdd.add_expr(clause)
-
-    print(f'k: {color_nr}, size: {len(cnf)}, models: {bdd.count(cnf)}')
-    print()
-##########################################################################
+            vertices = list(dict.fromkeys(dimacs.edges))
+
+        bits = {}
+        for vertex in vertices:
+            bits[vertex] = [f'x_{vertex + 1}_{j}' for j in range(bits_needed)]
+            for var in bits[vertex]:
+                bdd.add_var(var)
+        # Let sifting move the bits of a vertex as one block
+        if reordering is not None:
+            reordering.group_blocks(bdd, bits.values())
+
+        # Two adjacent vertices may not have the same color number, built lazily as in create_bdd
+        clauses = (not_equal(bdd, bits[u], bits[v]) for u, v in dimacs.iter_edges())
+        # A color number must be below color_nr
+        if color_nr < 1 << bits_needed:
+            clauses = chain(clauses, (less_than(bdd, bits[vertex], color_nr) for vertex in vertices))
+        # Symmetry breaking constraints go first, they fix colors early and keep the intermediate BDDs small
+        if symmetry is not None:
+            clauses = chain(symmetry.constraints(bdd, dimacs, bits, color_nr, 'binary'), clauses)
+
+    # Conjoin all clauses in the order given by the strategy
+    with phase(instrumentation, 'conjoin', bdd):
+        result, stats = conjoin(bdd, clauses, strategy, reordering, instrumentation)
+    print(stats)
+    with phase(instrumentation, 'count', bdd):
+        print(f'k: {color_nr}, size: {len(result)}, models: {bdd.count(result, nvars=len(bdd.vars))}')
+        if symmetry is not None:
+            print(f'k: {color_nr}, colorings: {symmetry.colorings(bdd, result, bits, color_nr, "binary")}')
+    return bdd, result
+
+
+# Splits a variable name x_{v}_{i} into its vertex block x_{v} and the color (one-hot) or bit (binary) index
+def split_var(var):
+    block, index = var.rsplit('_', 1)
+    return block, int(index)
+
+
+# Counts the k-colorings for k = k_max down to k_min in one manager, the k_max BDD is built once.
+# One-hot: the BDD for k - 1 is the BDD for k with the variables of color k - 1 set to false.
+# Binary: the BDD for k - 1 is the BDD for k conjoined with "color number below k - 1" for every vertex.
+# Both steps work on the nodes that are already there, nothing is parsed or built from scratch again.
+# Stops after the first k without colorings, returns {k: (size, models)}.
+def sweep_colors(f, k_max, k_min=1, encoding='one_hot', strategy='linear', ordering=None, reordering=None,
+                 instrumentation=None):
+    if encoding == 'one_hot':
+        bdd, result = create_bdd(f, k_max, strategy, ordering, reordering, instrumentation=instrumentation)
+    else:
+        bdd, result = create_bit_encoded_bdd(f, k_max, strategy, ordering, reordering,
+                                             instrumentation=instrumentation)
+
+    blocks = {}
+    for var in bdd.vars:
+        block, index = split_var(var)
+        blocks.setdefault(block, []).append((index, var))
+    blocks = [[var for _, var in sorted(block)] for block in blocks.values()]
+
+    counts = {}
+    for k in range(k_max, k_min - 1, -1):
+        if k < k_max:
+            if encoding == 'one_hot':
+                result = bdd.let({block[k]: False for block in blocks}, result)
+            else:
+                for block in blocks:
+                    result &= less_than(bdd, block, k)
+        # one-hot keeps k variables per vertex, binary keeps all its bits
+        nvars = len(blocks) * k if encoding == 'one_hot' else len(bdd.vars)
+        models = int(bdd.count(result, nvars=nvars))
+        counts[k] = (len(result), models)
+        print(f'k: {k}, size: {len(result)}, models: {models}')
+        if models == 0:
+            break
+    return counts
+
 
 if __name__ == '__main__':
     # Specify the directory containing DIMACS graph files
@@ -224,6 +206,28 @@ if __name__ == '__main__':
     # Specify the DIMACS graph file you want to analyze
     gcd_file = f"gcd.col"
 
+    # Order in which the clauses are conjoined: linear, balanced, cluster or smallest
+    conjunction_strategy = "linear"
+    # Static variable ordering: None (order of the edges), natural, cuthill_mckee, force or min_degree
+    variable_ordering = None
+    # Dynamic reordering and forced sifts during construction, e.g. ReorderConfig(dynamic=False, sift_every=200)
+    reordering = ReorderConfig()
+    # Color encoding: one_hot (k variables per vertex) or binary (ceil(log2 k) variables per vertex)
+    encoding = "one_hot"
+    build = create_bdd if encoding == "one_hot" else create_bit_encoded_bdd
+    # Symmetry breaking for color permutations: None or a symmetry.SymmetryBreaking('clique' or 'precedence')
+    symmetry = None
+    # Seconds spent on improving the heuristic coloring (iterated greedy and tabu search)
+    coloring_budget = 1.0
+    # Sweep k from the upper bound down to the lower bound in one manager instead of one BDD for the upper bound
+    sweep = False
+    # Phase timers and CUDD snapshots as JSON lines appended to events_path (None: off), a snapshot every
+    # snapshot_every conjunctions, and a cProfile dump per input file in profile_dir (None: off)
+    events_path = None
+    snapshot_every = 1000
+    profile_dir = None
+    instrumentation = from_settings("bdd_approach", events_path, snapshot_every, profile_dir)
+
     # Get a list of files in the directory
     directory = os.fsencode(dir_str)
 
@@ -231,18 +235,29 @@ if __name__ == '__main__':
         start = time()
         # Initialize the BDD manager
         filename = os.fsdecode(file)
+        # skip hidden entries, only the input files are parsed
+        if filename.startswith('.'):
+            continue
 
-        # Parse the DIMACS file and create the graph
-        graph = parse_dimacs(f"{dir_str}{filename}")
-
-        # Find the minimum number of registers required using greedy coloring
-        min_registers = graph.greedy_coloring()
-        print(f"Minimum number of registers required for {filename}: {min_registers}")
-
-        # Use the minimum number of registers as the upper bound for k
-        # if (filename=="zeroin-less.col"):
-        #     create_bdd(f"{dir_str}{filename}", min_registers)
-        create_bdd(f"{dir_str}{filename}", min_registers)
+        with input_file(instrumentation, filename):
+            # Parse the DIMACS file and create the graph
+            with phase(instrumentation, 'graph'):
+                graph = parse_dimacs(f"{dir_str}{filename}")
+
+            # Bound the minimum number of registers required by a clique and the best heuristic coloring
+            with phase(instrumentation, 'bounds'):
+                lower_bound, min_registers = graph.coloring_bounds(coloring_budget)
+            print(f"Minimum number of registers required for {filename}: {min_registers} (lower bound {lower_bound})")
+
+            # Use the minimum number of registers as the upper bound for k
+            # if (filename=="zeroin-less.col"):
+            #     create_bdd(f"{dir_str}{filename}", min_registers)
+            if sweep:
+                sweep_colors(f"{dir_str}{filename}", min_registers, lower_bound, encoding, conjunction_strategy,
+                             variable_ordering, reordering, instrumentation)
+            else:
+                build(f"{dir_str}{filename}", min_registers, conjunction_strategy, variable_ordering, reordering,
+                      symmetry, instrumentation)
         stop = time()
         print(f"Runtime of {file}: ", stop-start)
         print()
\ No newline at end of file
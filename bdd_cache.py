@@ -0,0 +1,102 @@
+import fcntl
+import os
+
+from dimacs_cache import file_hash, source_dir
+
+# On-disk cache of built BDDs, in the DDDMP format of CUDD.
+# The name of an entry holds the sha256 of the DIMACS source and the static ordering the BDD was built with,
+# so a changed source or another ordering never matches an old entry. The DDDMP header lists every variable
+# of the manager by level (.orderedvarnames): a load declares them in that order first, so the loaded BDD
+# comes back in the variable order it was dumped with, including the effect of any reordering.
+# The entries live next to this module like those of dimacs_cache, never inside the input directories.
+# Every entry has a lock file: the first process that misses an entry builds it while holding the lock, the
+# others (the batch workers of one feature model) wait for it and load the entry instead of building again.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.bdd_cache')
+
+
+def cache_path(f, digest, ordering, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = os.path.join(CACHE_DIR, source_dir(f))
+    return os.path.join(cache_dir, f'{os.path.basename(f)}.{ordering}.{digest}.dddmp')
+
+
+# Variable names by level, from the header of a DDDMP file
+def dumped_order(path):
+    with open(path) as file:
+        for line in file:
+            if line.startswith('.orderedvarnames'):
+                return line.split()[1:]
+            if line.startswith('.nodes'):
+                break
+    return None
+
+
+def write_bdd(path, bdd, u):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # entries (and their locks) for an older version of the same source and ordering are stale now,
+    # the current entry stays: os.replace below swaps it atomically for a process that is loading it
+    current = os.path.basename(path)
+    prefix = current.rsplit('.', 2)[0] + '.'
+    for name in os.listdir(directory):
+        entry = name[:-len('.lock')] if name.endswith('.lock') else name
+        if entry != current and entry.startswith(prefix) and entry.endswith('.dddmp') and \
+                entry.count('.') == prefix.count('.') + 1:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                # removed by another process at the same time
+                pass
+
+    # write to a temporary file first so a crashed run never leaves a half written entry behind
+    tmp = f'{path}.{os.getpid()}.tmp'
+    bdd.dump(tmp, [u], filetype='dddmp')
+    os.replace(tmp, path)
+
+
+# Loads the BDD of path into a manager without variables, returns None when the entry is unusable
+def load_bdd(path, bdd):
+    order = dumped_order(path)
+    if order is None or bdd.vars:
+        return None
+    for var in order:
+        bdd.add_var(var)
+    # the dumped order is already the one to keep, sifting while the nodes come in only costs time
+    reordering = bdd.configure(reordering=False)['reordering']
+    roots = bdd.load(path)
+    bdd.configure(reordering=reordering)
+    if len(roots) != 1:
+        return None
+    return roots[0]
+
+
+# Returns the BDD of f from the cache, or builds it with build(bdd) and stores it.
+# build declares the variables itself and returns the root, it only runs on a cache miss.
+def build_cached(f, bdd, ordering, build, cache_dir=None):
+    path = cache_path(f, file_hash(f), ordering, cache_dir)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock = open(f'{path}.lock', 'w')
+    except OSError:
+        # a read-only cache directory only costs the cache, not the run
+        return build(bdd), False
+
+    # closing the lock file releases the lock
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            u = load_bdd(path, bdd)
+        except OSError:
+            # no entry yet, or one that cannot be read: build it
+            u = None
+        if u is not None:
+            return u, True
+
+        u = build(bdd)
+        try:
+            write_bdd(path, bdd, u)
+        except OSError:
+            # a full or read-only cache directory only costs the cache, not the run
+            pass
+        return u, False
@@ -0,0 +1,95 @@
+# Clause builders on the BDD node API.
+# Literals come from bdd.var and negation and are combined with & / |, so building a clause
+# never goes through a formula string and the expression parser of add_expr.
+
+
+# A single literal, the variable itself or its negation
+def literal(bdd, name, positive=True):
+    u = bdd.var(name)
+    return u if positive else ~u
+
+
+# Disjunction of (name, positive) literals
+def clause(bdd, literals):
+    u = bdd.false
+    for name, positive in literals:
+        u |= literal(bdd, name, positive)
+    return u
+
+
+# Disjunction of BDDs as a balanced tree, the operands of every | stay about the same size
+def disjunction(bdd, terms):
+    layer = list(terms)
+    if not layer:
+        return bdd.false
+    while len(layer) > 1:
+        next_layer = [layer[i] | layer[i + 1] for i in range(0, len(layer) - 1, 2)]
+        if len(layer) % 2 == 1:
+            next_layer.append(layer[-1])
+        layer = next_layer
+    return layer[0]
+
+
+# Conjunction of the literals in an assignment {name: value}, the same as the cubes of the notebook
+def cube(bdd, assignment):
+    return bdd.cube(assignment)
+
+
+# Cube that encodes number in the given bit variables, the first variable holds the most significant bit
+def bits_cube(bdd, names, number):
+    width = len(names)
+    return bdd.cube({name: bool((number >> (width - 1 - i)) & 1) for i, name in enumerate(names)})
+
+
+# Clause of a DIMACS CNF, signed 1-based literals on the variables x1..xn
+def dimacs_clause(bdd, literals, prefix='x'):
+    u = bdd.false
+    for lit in literals:
+        if lit < 0:
+            u |= ~bdd.var(f'{prefix}{-lit}')
+        else:
+            u |= bdd.var(f'{prefix}{lit}')
+    return u
+
+
+# Exactly one of the variables is true
+def one_hot(bdd, names):
+    # none_yet / one_so_far track the prefix of the variables seen so far
+    none_yet = bdd.true
+    one_so_far = bdd.false
+    for name in names:
+        x = bdd.var(name)
+        one_so_far = bdd.ite(x, none_yet, one_so_far)
+        none_yet &= ~x
+    return one_so_far
+
+
+# Two vertices may not both have color i
+def not_both(bdd, a, b):
+    return ~bdd.var(a) | ~bdd.var(b)
+
+
+# Two bit vectors (same width) hold different numbers
+def not_equal(bdd, a_names, b_names):
+    u = bdd.false
+    for a, b in zip(a_names, b_names):
+        u |= bdd.apply('xor', bdd.var(a), bdd.var(b))
+    return u
+
+
+# The number in the bit variables is below bound, the first variable holds the most significant bit
+def less_than(bdd, names, bound):
+    width = len(names)
+    if bound >= 1 << width:
+        return bdd.true
+    if bound <= 0:
+        return bdd.false
+    # going up from the least significant bit, u says that the bits seen so far are below those of bound
+    u = bdd.false
+    for i in reversed(range(width)):
+        x = bdd.var(names[i])
+        if (bound >> (width - 1 - i)) & 1:
+            u = ~x | u
+        else:
+            u = ~x & u
+    return u
@@ -0,0 +1,129 @@
+import json
+import os
+import subprocess
+from time import strftime
+
+from batch import BatchRunner, jobs_for
+
+# Benchmark suite over data/ with a history and regression flags.
+# Every case is one workload of batch.py over one data directory with a timeout per job, the jobs run one at
+# a time so the timings do not disturb each other. A run appends one JSON line to the history file: the
+# time, the commit and the rows of batch.BatchRunner (wall time, peak resident memory, peak BDD nodes and
+# reorderings per job). The baseline file holds the rows of one earlier run, a job is flagged when
+#   status:  it finished in the baseline and not now
+#   seconds: it is slower than the baseline by more than the tolerance (and by more than min_seconds)
+#   nodes:   its peak BDD nodes grew by more than the tolerance
+# The configure jobs write their configurations to batch.CONFIGURE_OUTPUT, not over the tracked results of problem2.
+
+HISTORY = 'benchmark_history.jsonl'
+BASELINE = 'benchmark_baseline.json'
+
+# (workload, directory or file, options, timeout in seconds per job)
+# Every default case finishes well within its timeout, a case that times out in the baseline gives no signal.
+# The coloring BDDs of the other less-dimacs and small-dimacs graphs and the chromatic polynomial of
+# mulsol-small take longer than these timeouts.
+LESS = os.path.join('data', 'less-dimacs')
+CASES = [
+    ('count', os.path.join('data', 'small-dimacs'), ['bitset'], 60),
+    ('count', LESS, ['polynomial', 'bitset'], 60),
+    ('coloring', os.path.join(LESS, 'gcd.col'), ['one_hot', 'binary'], 60),
+    ('coloring', os.path.join(LESS, 'fpsol2-less.col'), ['one_hot'], 180),
+    ('coloring', os.path.join(LESS, 'inithx-less.col'), ['one_hot'], 180),
+    ('configure', os.path.join('data', 'feature-dimacs'), ['a', 'c'], 1800),
+    ('trace', os.path.join('data', 'p3_data'), [None], 60),
+]
+# Opt in with include_big, these take minutes per job and can time out
+BIG_CASES = [
+    ('count', os.path.join('data', 'big-dimacs'), ['bitset'], 600),
+    ('coloring', os.path.join('data', 'big-dimacs'), ['one_hot'], 600),
+]
+
+
+def case_key(row):
+    return f"{row['workload']}:{row['file']}:{row['option']}"
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Runs the cases and returns the rows, one job at a time unless processes says otherwise
+def run_suite(cases=CASES, processes=1, memory_cap=None):
+    rows = []
+    for workload, directory, options, timeout in cases:
+        runner = BatchRunner(processes=processes, timeout=timeout, memory_cap=memory_cap)
+        rows += runner.run(jobs_for(workload, directory, options))
+    return rows
+
+
+def append_history(rows, path=HISTORY):
+    with open(path, 'a') as file:
+        file.write(json.dumps({'time': strftime('%Y-%m-%d %H:%M:%S'), 'commit': current_commit(),
+                               'rows': rows}) + '\n')
+
+
+def read_history(path=HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def write_baseline(rows, path=BASELINE):
+    with open(path, 'w') as file:
+        json.dump({case_key(row): row for row in rows}, file, indent=1)
+
+
+def read_baseline(path=BASELINE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+# Returns (key, reason) for every job that got worse than in the baseline
+def regressions(rows, baseline, tolerance=0.25, min_seconds=0.5):
+    flags = []
+    for row in rows:
+        key = case_key(row)
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        if before['status'] == 'ok' and row['status'] != 'ok':
+            flags.append((key, f"status {before['status']} -> {row['status']}"))
+            continue
+        if row['status'] != 'ok':
+            continue
+        if row['seconds'] > before['seconds'] * (1 + tolerance) and \
+                row['seconds'] - before['seconds'] > min_seconds:
+            flags.append((key, f"seconds {before['seconds']} -> {row['seconds']}"))
+        if before.get('peak_nodes') and row.get('peak_nodes', 0) > before['peak_nodes'] * (1 + tolerance):
+            flags.append((key, f"peak nodes {before['peak_nodes']} -> {row['peak_nodes']}"))
+    return flags
+
+
+if __name__ == '__main__':
+    # Relative growth of seconds or peak nodes that counts as a regression
+    tolerance = 0.25
+    # Store this run as the new baseline (also done when there is no baseline yet)
+    update_baseline = False
+    # Also run the big-dimacs cases
+    include_big = False
+
+    rows = run_suite(CASES + BIG_CASES if include_big else CASES)
+    append_history(rows)
+
+    baseline = read_baseline()
+    flags = regressions(rows, baseline, tolerance)
+    print()
+    for key, reason in flags:
+        print(f"REGRESSION {key}: {reason}")
+    print(f"{len(rows)} jobs, {len(flags)} regressions against {len(baseline)} baseline jobs")
+
+    if update_baseline or not baseline:
+        write_baseline(rows)
+        print(f"Baseline written to {BASELINE}")
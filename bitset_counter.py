@@ -0,0 +1,136 @@
+from chromatic import clean_adjacency
+
+# Exact k-coloring counter by backtracking on bitsets.
+# Sets of vertices and sets of colors are Python ints used as bitmasks. A subproblem is the set of uncolored
+# vertices plus the forbidden colors of those next to an already colored vertex, which is all the colored part
+# of the graph can still tell about the rest. Every subproblem:
+#   - splits the uncolored vertices into connected components, the count is the product of theirs
+#   - branches on the most constrained vertex (DSatur: most forbidden colors, then most uncolored neighbours)
+#     and adds the forbidden color to its uncolored neighbours incrementally
+#   - is cached on (uncolored vertices, forbidden colors up to a permutation of the colors), also when the
+#     count is 0
+# The search runs on an explicit stack of generators, so deep graphs never hit the recursion limit.
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def vertices_of(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def split_components(uncolored, neighbors):
+    components = []
+    rest = uncolored
+    while rest:
+        component = frontier = rest & -rest
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            new = neighbors[low.bit_length() - 1] & rest & ~component
+            component |= new
+            frontier |= new
+        components.append(component)
+        rest &= ~component
+    return components
+
+
+class BitsetCounter:
+    def __init__(self, adjacency, k):
+        adjacency = clean_adjacency(adjacency)
+        self.k = k
+        self.all_colors = (1 << k) - 1
+        self.neighbors = [sum(1 << w for w in nbrs) for nbrs in adjacency]
+        self.loops = any(v in nbrs for v, nbrs in enumerate(adjacency))
+        self.cache = {}
+
+    # Canonical key of a subproblem, forbidden only holds entries for uncolored vertices.
+    # The count does not change when the colors are permuted, so the colors are renumbered in the order in
+    # which they first show up in the forbidden sets of the vertices, lowest vertex first.
+    def signature(self, uncolored, forbidden):
+        relabel = {}
+        masks = []
+        for v in sorted(forbidden):
+            mask = 0
+            for color in vertices_of(forbidden[v]):
+                if color not in relabel:
+                    relabel[color] = len(relabel)
+                mask |= 1 << relabel[color]
+            masks.append((v, mask))
+        return uncolored, tuple(masks)
+
+    # Generator for one subproblem, yields the subproblems it needs and receives their counts
+    def solve(self, uncolored, forbidden):
+        components = split_components(uncolored, self.neighbors)
+        if len(components) > 1:
+            total = 1
+            for component in components:
+                part = {v: colors for v, colors in forbidden.items() if component >> v & 1}
+                total *= yield component, part
+                if total == 0:
+                    break
+            return total
+
+        if uncolored & (uncolored - 1) == 0:
+            # a single vertex, it may take every color that is not forbidden
+            return self.k - popcount(forbidden.get(uncolored.bit_length() - 1, 0))
+
+        neighbors = self.neighbors
+        v = max(vertices_of(uncolored),
+                key=lambda w: (popcount(forbidden.get(w, 0)), popcount(neighbors[w] & uncolored)))
+        rest = uncolored & ~(1 << v)
+        free = self.all_colors & ~forbidden.get(v, 0)
+        total = 0
+        for color in vertices_of(free):
+            bit = 1 << color
+            branch = {w: colors for w, colors in forbidden.items() if w != v}
+            dead = False
+            for w in vertices_of(neighbors[v] & rest):
+                colors = branch.get(w, 0) | bit
+                if colors == self.all_colors:
+                    # w has no color left, a nogood
+                    dead = True
+                    break
+                branch[w] = colors
+            if not dead:
+                total += yield rest, branch
+        return total
+
+    def count(self):
+        if self.loops:
+            return 0
+        uncolored = (1 << len(self.neighbors)) - 1
+        if uncolored == 0:
+            return 1
+        if self.k <= 0:
+            return 0
+
+        cache = self.cache
+        stack = [(self.signature(uncolored, {}), self.solve(uncolored, {}))]
+        value = None
+        while True:
+            key, frame = stack[-1]
+            try:
+                uncolored, forbidden = frame.send(value)
+            except StopIteration as done:
+                stack.pop()
+                cache[key] = done.value
+                if not stack:
+                    return done.value
+                value = done.value
+                continue
+            sub_key = self.signature(uncolored, forbidden)
+            if sub_key in cache:
+                value = cache[sub_key]
+            else:
+                stack.append((sub_key, self.solve(uncolored, forbidden)))
+                value = None
+
+
+# Exact number of k-colorings, as a drop-in for total_naive_k_colorings
+def count_k_colorings(adjacency, k):
+    return BitsetCounter(adjacency, k).count()
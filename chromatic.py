@@ -0,0 +1,167 @@
+from collections import defaultdict
+
+# Chromatic polynomial of a graph, computed once and evaluated for any k.
+# Simplicial vertices (their neighbours form a clique) are peeled off first: such a vertex with d neighbours
+# left has k - d colors in every coloring of the rest, so it only adds the factor (k - d).
+# The rest of the graph is split into connected components (the polynomial of the graph is the product of theirs).
+# Every component is handled by a DP over a vertex order that counts a[j], the number of partitions of the
+# vertices into j independent sets, since P(k) = sum_j a[j] * k * (k - 1) * ... * (k - j + 1).
+# The DP state is the partition of the frontier (processed vertices that still have unprocessed neighbours)
+# plus the number of closed sets, sets without a frontier vertex. A new vertex may join every closed set,
+# it cannot be adjacent to any of their vertices since those have no unprocessed neighbours left.
+
+
+def clean_adjacency(adjacency):
+    return [sorted(set(neighbors)) for neighbors in adjacency]
+
+
+def connected_components(adjacency):
+    seen = [False] * len(adjacency)
+    components = []
+    for start in range(len(adjacency)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        component = [start]
+        stack = [start]
+        while stack:
+            u = stack.pop()
+            for v in adjacency[u]:
+                if not seen[v]:
+                    seen[v] = True
+                    component.append(v)
+                    stack.append(v)
+        components.append(component)
+    return components
+
+
+# Removes simplicial vertices until none are left, returns the degrees they had and the remaining adjacency
+def peel_simplicial(adjacency):
+    neighbors = [set(nbrs) for nbrs in adjacency]
+    degrees = []
+    queue = list(range(len(adjacency)))
+    alive = [True] * len(adjacency)
+    while queue:
+        v = queue.pop()
+        if not alive[v]:
+            continue
+        nbrs = neighbors[v]
+        if all(len(nbrs & neighbors[w]) == len(nbrs) - 1 for w in nbrs):
+            alive[v] = False
+            degrees.append(len(nbrs))
+            for w in nbrs:
+                neighbors[w].discard(v)
+                # a neighbour may have become simplicial now
+                queue.append(w)
+            neighbors[v] = set()
+    remaining = [v for v in range(len(adjacency)) if alive[v]]
+    index = {v: i for i, v in enumerate(remaining)}
+    return degrees, [sorted(index[w] for w in neighbors[v]) for v in remaining]
+
+
+# Greedy order that keeps the frontier small: next is the vertex with the most processed neighbours,
+# ties broken by the fewest unprocessed ones
+def frontier_order(adjacency, component):
+    remaining = set(component)
+    processed_neighbors = {v: 0 for v in component}
+    order = []
+    while remaining:
+        v = max(remaining, key=lambda w: (processed_neighbors[w], -len(adjacency[w]), -w))
+        remaining.remove(v)
+        order.append(v)
+        for w in adjacency[v]:
+            if w in remaining:
+                processed_neighbors[w] += 1
+    return order
+
+
+# a[j] = number of partitions of the vertices of a connected component into j independent sets
+def partition_counts(adjacency, order):
+    position = {v: i for i, v in enumerate(order)}
+    retire_at = defaultdict(list)
+    for v in order:
+        retire_at[max([position[w] for w in adjacency[v]] + [position[v]])].append(v)
+
+    # (frontier blocks, number of closed sets) -> number of partial partitions
+    states = {((), 0): 1}
+    for i, v in enumerate(order):
+        neighbors = set(adjacency[v])
+        retiring = set(retire_at[i])
+        next_states = defaultdict(int)
+
+        def add(blocks, closed, count):
+            kept = []
+            for block in blocks:
+                block = tuple(w for w in block if w not in retiring)
+                if block:
+                    kept.append(block)
+                else:
+                    closed += 1
+            next_states[(tuple(sorted(kept)), closed)] += count
+
+        for (blocks, closed), count in states.items():
+            # v starts a new set, or reopens one of the closed sets
+            add(blocks + ((v,),), closed, count)
+            if closed:
+                add(blocks + ((v,),), closed - 1, count * closed)
+            # v joins an open set without a neighbour in it
+            for b, block in enumerate(blocks):
+                if neighbors.isdisjoint(block):
+                    add(blocks[:b] + (block + (v,),) + blocks[b + 1:], closed, count)
+        states = next_states
+
+    counts = defaultdict(int)
+    for (_, closed), count in states.items():
+        counts[closed] += count
+    return [counts[j] for j in range(max(counts) + 1)]
+
+
+def multiply(p, q):
+    result = [0] * (len(p) + len(q) - 1)
+    for i, a in enumerate(p):
+        if a:
+            for j, b in enumerate(q):
+                result[i + j] += a * b
+    return result
+
+
+# Coefficients (lowest power first) of sum_j a[j] * k * (k - 1) * ... * (k - j + 1)
+def falling_factorial_sum(a):
+    result = [0] * len(a)
+    falling = [1]
+    for j, count in enumerate(a):
+        for power, c in enumerate(falling):
+            result[power] += count * c
+        falling = multiply(falling, [-j, 1])
+    return result
+
+
+# Coefficients of the chromatic polynomial, lowest power first, for graphs given as adjacency lists
+def chromatic_polynomial(adjacency):
+    adjacency = clean_adjacency(adjacency)
+    if any(v in neighbors for v, neighbors in enumerate(adjacency)):
+        # a self loop can never be colored
+        return [0]
+    degrees, adjacency = peel_simplicial(adjacency)
+    polynomial = [1]
+    for d in degrees:
+        polynomial = multiply(polynomial, [-d, 1])
+    for component in connected_components(adjacency):
+        counts = partition_counts(adjacency, frontier_order(adjacency, component))
+        polynomial = multiply(polynomial, falling_factorial_sum(counts))
+    return polynomial
+
+
+def evaluate(polynomial, k):
+    result = 0
+    for c in reversed(polynomial):
+        result = result * k + c
+    return result
+
+
+# Smallest k with at least one k-coloring
+def chromatic_number(polynomial, upper_bound):
+    k = upper_bound
+    while k > 0 and evaluate(polynomial, k - 1) > 0:
+        k -= 1
+    return k
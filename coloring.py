@@ -0,0 +1,211 @@
+from random import Random
+from time import time
+
+import numpy as np
+
+from chromatic import clean_adjacency
+
+# Graph coloring heuristics for the upper bound on k, plus a clique for the lower bound.
+# The graph is kept as NumPy CSR arrays: the neighbours of v are neighbors[offsets[v]:offsets[v + 1]].
+# Colors are 0-based, a coloring is an int array with the color of every vertex.
+#   natural:       greedy in the order 0..V-1
+#   largest_first: greedy by decreasing degree
+#   smallest_last: greedy in the reverse of the order that keeps removing a vertex of the lowest degree
+#   dsatur:        always colors the vertex with the most distinct neighbour colors, then the highest degree
+# improve_coloring then runs iterated greedy and TabuCol under a time budget until it meets the lower bound.
+
+ORDERS = ['natural', 'largest_first', 'smallest_last', 'dsatur']
+
+
+class CSRGraph:
+    def __init__(self, adjacency):
+        # self loops are dropped, they would make every coloring improper
+        adjacency = [[w for w in nbrs if w != v] for v, nbrs in enumerate(clean_adjacency(adjacency))]
+        self.V = len(adjacency)
+        self.degree = np.array([len(nbrs) for nbrs in adjacency], dtype=np.int64)
+        self.offsets = np.zeros(self.V + 1, dtype=np.int64)
+        np.cumsum(self.degree, out=self.offsets[1:])
+        self.neighbors = np.array([w for nbrs in adjacency for w in nbrs], dtype=np.int64)
+        # bitsets of the neighbours, for the clique search
+        self.masks = [sum(1 << w for w in nbrs) for nbrs in adjacency]
+
+    def neighbors_of(self, v):
+        return self.neighbors[self.offsets[v]:self.offsets[v + 1]]
+
+
+def bits_of(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def number_of_colors(colors):
+    return int(colors.max()) + 1 if len(colors) else 0
+
+
+# Smallest color that is not used by a neighbour of v
+def smallest_free(graph, colors, v):
+    used = colors[graph.neighbors_of(v)]
+    taken = np.zeros(len(used) + 1, dtype=bool)
+    taken[used[(used >= 0) & (used <= len(used))]] = True
+    return int(taken.argmin())
+
+
+def greedy(graph, order):
+    colors = np.full(graph.V, -1, dtype=np.int64)
+    for v in order:
+        colors[v] = smallest_free(graph, colors, v)
+    return colors
+
+
+def smallest_last_order(graph):
+    degree = graph.degree.copy()
+    removed = np.zeros(graph.V, dtype=bool)
+    order = []
+    for _ in range(graph.V):
+        v = int(np.where(removed, graph.V, degree).argmin())
+        removed[v] = True
+        order.append(v)
+        degree[graph.neighbors_of(v)] -= 1
+    return order[::-1]
+
+
+def dsatur(graph):
+    colors = np.full(graph.V, -1, dtype=np.int64)
+    # neighbour_colors[v, c] is set when a neighbour of v has color c, a vertex never needs more than V colors
+    neighbour_colors = np.zeros((graph.V, graph.V + 1), dtype=bool)
+    saturation = np.zeros(graph.V, dtype=np.int64)
+    # ties on the saturation go to the highest degree
+    key = saturation * (graph.V + 1) + graph.degree
+    for _ in range(graph.V):
+        v = int(np.where(colors >= 0, -1, key).argmax())
+        color = int(neighbour_colors[v].argmin())
+        colors[v] = color
+        nbrs = graph.neighbors_of(v)
+        fresh = nbrs[~neighbour_colors[nbrs, color]]
+        neighbour_colors[fresh, color] = True
+        saturation[fresh] += 1
+        key[fresh] += graph.V + 1
+    return colors
+
+
+def color(graph, order='dsatur'):
+    if order == 'natural':
+        return greedy(graph, range(graph.V))
+    if order == 'largest_first':
+        return greedy(graph, np.argsort(-graph.degree, kind='stable'))
+    if order == 'smallest_last':
+        return greedy(graph, smallest_last_order(graph))
+    if order == 'dsatur':
+        return dsatur(graph)
+    raise ValueError(f"Unknown coloring order '{order}', choose one of {ORDERS}")
+
+
+# Greedy clique: starting from every vertex (highest degree first) keep adding the candidate with the most
+# neighbours among the remaining candidates. The size of the largest clique found is a lower bound on k.
+def greedy_clique(graph, starts=None):
+    masks = graph.masks
+    best = []
+    order = np.argsort(-graph.degree, kind='stable')
+    for v in order[:starts]:
+        v = int(v)
+        if graph.degree[v] < len(best):
+            break
+        clique = [v]
+        candidates = masks[v]
+        while candidates:
+            w = max(bits_of(candidates), key=lambda w: bin(masks[w] & candidates).count('1'))
+            clique.append(w)
+            candidates &= masks[w]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+# Culberson's iterated greedy: greedy again with the color classes as blocks, in a new order of the classes.
+# The new coloring never uses more colors than the old one.
+def iterated_greedy_step(graph, colors, rng):
+    classes = [np.flatnonzero(colors == c) for c in range(number_of_colors(colors))]
+    choice = rng.randrange(3)
+    if choice == 0:
+        classes.reverse()
+    elif choice == 1:
+        classes.sort(key=len, reverse=True)
+    else:
+        rng.shuffle(classes)
+    return greedy(graph, np.concatenate(classes) if classes else [])
+
+
+# TabuCol: looks for a k-coloring by moving single conflicting vertices to another color, the reverse of
+# a move is tabu for a few iterations. Returns the coloring or None when the deadline passes.
+def tabucol(graph, k, colors, deadline, rng, tenure=7):
+    colors = np.where(colors < k, colors, np.array([rng.randrange(k) for _ in range(graph.V)]))
+    # conflicts[v, c] = number of neighbours of v with color c
+    conflicts = np.zeros((graph.V, k), dtype=np.int64)
+    rows = np.repeat(np.arange(graph.V), graph.degree)
+    np.add.at(conflicts, (rows, colors[graph.neighbors]), 1)
+    tabu = np.zeros((graph.V, k), dtype=np.int64)
+    vertices = np.arange(graph.V)
+    iteration = 0
+    while time() < deadline:
+        current = conflicts[vertices, colors]
+        conflicting = np.flatnonzero(current > 0)
+        if len(conflicting) == 0:
+            return colors
+        iteration += 1
+        # change in conflicts of every move of a conflicting vertex, tabu and unchanged colors excluded
+        delta = conflicts[conflicting] - current[conflicting, None]
+        delta[np.arange(len(conflicting)), colors[conflicting]] = graph.V
+        delta[tabu[conflicting] > iteration] = graph.V
+        best = np.flatnonzero(delta == delta.min())
+        move = int(best[rng.randrange(len(best))])
+        v, c = int(conflicting[move // k]), move % k
+        if delta.flat[move] >= graph.V:
+            # every move is tabu
+            continue
+        old = int(colors[v])
+        nbrs = graph.neighbors_of(v)
+        conflicts[nbrs, old] -= 1
+        conflicts[nbrs, c] += 1
+        colors[v] = c
+        tabu[v, old] = iteration + tenure + rng.randrange(10)
+    return None
+
+
+# Best coloring within the time budget: iterated greedy first, then TabuCol for ever fewer colors.
+# Stops early once the number of colors meets the lower bound.
+def improve_coloring(graph, colors, lower_bound=0, time_budget=1.0, seed=0):
+    rng = Random(seed)
+    deadline = time() + time_budget
+    best = colors
+    while number_of_colors(best) > lower_bound and time() < deadline:
+        improved = False
+        for _ in range(100):
+            colors = iterated_greedy_step(graph, colors, rng)
+            if number_of_colors(colors) < number_of_colors(best):
+                best, improved = colors, True
+        if not improved:
+            break
+    while number_of_colors(best) > lower_bound and time() < deadline:
+        found = tabucol(graph, number_of_colors(best) - 1, best.copy(), deadline, rng)
+        if found is None:
+            break
+        best = found
+    return best
+
+
+# (lower bound, upper bound, coloring) for k, from a clique and the best of the orders plus improvement
+def color_bounds(adjacency, time_budget=1.0, seed=0):
+    graph = CSRGraph(adjacency)
+    lower = len(greedy_clique(graph)) if graph.V else 0
+    best = min((color(graph, order) for order in ORDERS), key=number_of_colors)
+    if number_of_colors(best) > lower and time_budget > 0:
+        best = improve_coloring(graph, best, lower, time_budget, seed)
+    return lower, number_of_colors(best), best
+
+
+# Checks that no edge has both ends in the same color
+def is_proper(graph, colors):
+    rows = np.repeat(np.arange(graph.V), graph.degree)
+    return bool(np.all(colors >= 0)) and not np.any(colors[rows] == colors[graph.neighbors])
@@ -0,0 +1,64 @@
+from backbone import backbone
+from bdd_clauses import literal
+from model_counting import MarginalCounts
+
+# State of a configuration run on a feature-model BDD.
+# After each decision one traversal of the current expressions gives the support and the backbone
+# (backbone.backbone), the literals that the decisions so far imply. Those are assigned and written in bulk
+# without counting anything. An implied literal leaves the BDD as it is, so it needs neither a conjunction
+# nor a new traversal. The with/without counts (model_counting.MarginalCounts) are only computed when a
+# strategy asks for the counts of a feature that is still open.
+
+
+class Configuration:
+    def __init__(self, bdd, expressions, order, out):
+        self.bdd = bdd
+        self.expressions = expressions
+        # features in configuration order, the implied ones are written in this order too
+        self.position = {feat: i for i, feat in enumerate(order)}
+        self.out = out
+        self.counter = MarginalCounts(bdd, expressions)
+        self.assignment = {}
+        self.added = 0
+        self.negated_added = 0
+
+    # A feature still needs a decision: it is in the support and it was not assigned yet.
+    # The backbone is assigned after every decision, so an open feature has models on both sides.
+    def is_open(self, feat):
+        return feat in self.counter.support() and feat not in self.assignment
+
+    # The open features in configuration order
+    def candidates(self):
+        return sorted((feat for feat in self.counter.support() if feat not in self.assignment),
+                      key=lambda feat: self.position.get(feat, len(self.position)))
+
+    # (negated_count, normal_count) of an open feature
+    def counts(self, feat):
+        return self.counter.get(feat)
+
+    def assign(self, feat, value):
+        self.assignment[feat] = value
+        if value:
+            self.added += 1
+            return f"Including {feat}\n"
+        self.negated_added += 1
+        return f"Excluding {feat}\n"
+
+    # Conjoins a decision and assigns everything it implies, returns the implied (feature, value) pairs.
+    # product is the conjunction of the expressions with the decision when the caller already has it.
+    def decide(self, feat, value, product=None):
+        self.out.write(self.assign(feat, value))
+        self.counter.release()
+        if product is None:
+            product = self.expressions & literal(self.bdd, feat, value)
+        self.expressions = product
+        self.counter.update(self.expressions)
+        return self.propagate()
+
+    # Assigns the backbone literals that are not assigned yet, in configuration order
+    def propagate(self):
+        forced = backbone(self.bdd, self.expressions, self.counter.nodes())
+        implied = sorted(((feat, value) for feat, value in forced.items() if feat not in self.assignment),
+                         key=lambda pair: self.position.get(pair[0], len(self.position)))
+        self.out.write(''.join(self.assign(feat, value) for feat, value in implied))
+        return implied
@@ -0,0 +1 @@
+# Puts the repository root on sys.path, so the tests in tests/ import the scripts and modules as they are
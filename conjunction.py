@@ -0,0 +1,131 @@
+import heapq
+
+# Conjunction schedules for clause BDDs.
+# Folding the clauses into one accumulator in file order can build far larger intermediate BDDs
+# than the final result, the other schedules keep the operands of every & small and close together.
+#   linear:   ((c0 & c1) & c2) & ..., the fold all builders used so far
+#   balanced: pairwise tree, c0 & c1, c2 & c3, ... and then the same on the results
+#   cluster:  clauses are grouped by the top variable of their support, every group is conjoined
+#             and the groups are added from the bottom of the variable order upwards
+#   smallest: priority queue, always conjoin the two smallest BDDs
+# The clauses may come from a generator. linear takes them one at a time, so only the accumulator and the
+# clause at hand are alive (CUDD's dynamic reordering sifts every live BDD), the others need them all first.
+
+STRATEGIES = ['linear', 'balanced', 'cluster', 'smallest']
+
+
+# Tracks the largest intermediate BDD of a schedule, and hands every conjunction to the reordering control
+# and the instrumentation
+class ConjunctionStats:
+    def __init__(self, strategy, bdd=None, reordering=None, instrumentation=None):
+        self.strategy = strategy
+        self.bdd = bdd
+        self.reordering = reordering
+        self.instrumentation = instrumentation
+        self.peak_nodes = 0
+        self.conjunctions = 0
+
+    def record(self, u):
+        self.conjunctions += 1
+        self.peak_nodes = max(self.peak_nodes, len(u))
+        if self.reordering is not None:
+            self.reordering.step(self.bdd)
+        if self.instrumentation is not None:
+            self.instrumentation.step(self.bdd)
+        return u
+
+    def __str__(self):
+        return f'{self.strategy}: peak nodes {self.peak_nodes}, conjunctions {self.conjunctions}'
+
+
+def conjoin_linear(bdd, clauses, stats):
+    result = bdd.true
+    for c in clauses:
+        result = stats.record(result & c)
+        if result == bdd.false:
+            break
+    return result
+
+
+def conjoin_balanced(bdd, clauses, stats):
+    layer = list(clauses)
+    if not layer:
+        return bdd.true
+    while len(layer) > 1:
+        next_layer = []
+        for i in range(0, len(layer) - 1, 2):
+            u = stats.record(layer[i] & layer[i + 1])
+            if u == bdd.false:
+                return u
+            next_layer.append(u)
+        if len(layer) % 2 == 1:
+            next_layer.append(layer[-1])
+        layer = next_layer
+    return layer[0]
+
+
+def conjoin_cluster(bdd, clauses, stats):
+    clusters = {}
+    for c in clauses:
+        support = bdd.support(c)
+        top = min((bdd.level_of_var(var) for var in support), default=len(bdd.vars))
+        clusters.setdefault(top, []).append(c)
+
+    result = bdd.true
+    # deepest cluster first, so the upper clauses are added to an already small BDD
+    for top in sorted(clusters, reverse=True):
+        part = conjoin_balanced(bdd, clusters[top], stats)
+        result = stats.record(result & part)
+        if result == bdd.false:
+            break
+    return result
+
+
+def conjoin_smallest(bdd, clauses, stats):
+    # the counter keeps the heap from ever comparing two BDDs
+    heap = [(len(c), i, c) for i, c in enumerate(clauses)]
+    if not heap:
+        return bdd.true
+    heapq.heapify(heap)
+    counter = len(heap)
+    while len(heap) > 1:
+        _, _, u = heapq.heappop(heap)
+        _, _, v = heapq.heappop(heap)
+        w = stats.record(u & v)
+        if w == bdd.false:
+            return w
+        heapq.heappush(heap, (len(w), counter, w))
+        counter += 1
+    return heap[0][2]
+
+
+SCHEDULES = {
+    'linear': conjoin_linear,
+    'balanced': conjoin_balanced,
+    'cluster': conjoin_cluster,
+    'smallest': conjoin_smallest,
+}
+
+
+# Conjoins all clauses (any iterable) with the chosen strategy, returns the result and the stats of the schedule.
+# reordering is an optional reordering.ReorderConfig that may sift between the conjunctions,
+# instrumentation an optional instrumentation.Instrumentation that takes periodic CUDD snapshots.
+def conjoin(bdd, clauses, strategy='linear', reordering=None, instrumentation=None):
+    if strategy not in SCHEDULES:
+        raise ValueError(f"Unknown conjunction strategy '{strategy}', choose one of {STRATEGIES}")
+    if strategy != 'linear':
+        clauses = list(clauses)
+    stats = ConjunctionStats(strategy, bdd, reordering, instrumentation)
+    result = SCHEDULES[strategy](bdd, clauses, stats)
+    if reordering is not None:
+        reordering.finish(bdd)
+    return result, stats
+
+
+# Runs every strategy on the same list of clauses and returns {strategy: stats}, to pick the cheapest one for an input
+def compare_strategies(bdd, clauses, strategies=STRATEGIES):
+    report = {}
+    for strategy in strategies:
+        _, stats = conjoin(bdd, clauses, strategy)
+        report[strategy] = stats
+    return report
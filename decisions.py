@@ -0,0 +1,112 @@
+from tqdm import tqdm
+
+from bdd_clauses import literal
+
+# Decision strategies of the configurator.
+# A strategy gets the open features in configuration order and the FeatureStats of the current expressions,
+# and returns the next decision (feature, value). FeatureStats computes what a strategy asks for in one batch
+# for all open features: the with/without counts in one pass over the nodes, the sizes of the BDD after every
+# possible decision in one round of conjunctions. A strategy that looks at nothing costs nothing.
+# Every open feature can be included and excluded (configuration.Configuration assigns the backbone).
+#   a:                  include the first open feature
+#   b:                  exclude the first open feature
+#   c:                  include the first open feature when that keeps more configurations than excluding it
+#   d:                  exclude the first open feature when that keeps more configurations than including it
+#   max_configurations: the decision over all open features that keeps the most configurations
+#   min_size:           the decision over all open features that leaves the smallest BDD
+
+STRATEGIES = ['a', 'b', 'c', 'd', 'max_configurations', 'min_size']
+
+
+# Statistics of the open features, computed per batch on first use
+class FeatureStats:
+    def __init__(self, config, candidates):
+        self.config = config
+        self.candidates = candidates
+        self.products = None
+
+    # (negated_count, normal_count) of an open feature
+    def counts(self, feat):
+        return self.config.counts(feat)
+
+    # The expressions after each decision {(feature, value): BDD}
+    def results(self):
+        if self.products is None:
+            bdd = self.config.bdd
+            expressions = self.config.expressions
+            self.config.counter.release()
+            self.products = {(feat, value): expressions & literal(bdd, feat, value)
+                             for feat in self.candidates for value in (False, True)}
+        return self.products
+
+    # Number of nodes of the BDD after deciding value for feat
+    def size(self, feat, value):
+        return len(self.results()[(feat, value)])
+
+
+def always_include(candidates, stats):
+    return candidates[0], True
+
+
+def always_exclude(candidates, stats):
+    return candidates[0], False
+
+
+def include_if_more(candidates, stats):
+    feat = candidates[0]
+    negated_count, normal_count = stats.counts(feat)
+    return feat, normal_count > negated_count
+
+
+def exclude_if_more(candidates, stats):
+    feat = candidates[0]
+    negated_count, normal_count = stats.counts(feat)
+    return feat, not negated_count > normal_count
+
+
+def max_configurations(candidates, stats):
+    # the first in configuration order wins a tie
+    best = None
+    for feat in candidates:
+        negated_count, normal_count = stats.counts(feat)
+        for count, value in ((normal_count, True), (negated_count, False)):
+            if best is None or count > best[0]:
+                best = (count, feat, value)
+    return best[1], best[2]
+
+
+def min_size(candidates, stats):
+    best = None
+    for feat in candidates:
+        for value in (True, False):
+            size = stats.size(feat, value)
+            if best is None or size < best[0]:
+                best = (size, feat, value)
+    return best[1], best[2]
+
+
+DECISIONS = {
+    'a': always_include,
+    'b': always_exclude,
+    'c': include_if_more,
+    'd': exclude_if_more,
+    'max_configurations': max_configurations,
+    'min_size': min_size,
+}
+
+
+# Decides open features with the strategy until none is left
+def configure(config, strategy):
+    if strategy not in DECISIONS:
+        raise ValueError(f"Unknown decision strategy '{strategy}', choose one of {STRATEGIES}")
+    choose = DECISIONS[strategy]
+    with tqdm(total=len(config.position)) as progress:
+        candidates = config.candidates()
+        while candidates:
+            stats = FeatureStats(config, candidates)
+            feat, value = choose(candidates, stats)
+            # a conjunction the strategy already made for its statistics is not made again
+            product = stats.products[(feat, value)] if stats.products is not None else None
+            config.decide(feat, value, product)
+            progress.update(len(config.assignment) - progress.n)
+            candidates = config.candidates()
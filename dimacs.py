@@ -0,0 +1,123 @@
+from array import array
+
+# Shared DIMACS parser for the .col graph files and the .dimacs CNF files.
+# The file is streamed line by line into flat int32 arrays, so memory grows linearly with the input:
+#   - graphs keep their edges as one array (u0, v0, u1, v1, ...) with 0-based vertices
+#   - CNFs keep all literals in one buffer plus the offset at which every clause starts
+# The 'c vo' (variable ordering) and 'c path' comment lines are kept as metadata.
+
+
+# Parsed .col file
+class DimacsGraph:
+    def __init__(self, vertices, edges, paths, path_offsets):
+        self.V = vertices
+        self.edges = edges
+        self.paths = paths
+        self.path_offsets = path_offsets
+
+    def edge_count(self):
+        return len(self.edges) // 2
+
+    # Yields the 0-based (u, v) pairs in file order
+    def iter_edges(self):
+        edges = self.edges
+        for i in range(0, len(edges), 2):
+            yield edges[i], edges[i + 1]
+
+    # Yields the 'c path' lines as lists of 1-based vertices, the way they appear in the file
+    def iter_paths(self):
+        offsets = self.path_offsets
+        for i in range(len(offsets) - 1):
+            yield self.paths[offsets[i]:offsets[i + 1]].tolist()
+
+    # Compressed sparse row adjacency: the neighbours of u are neighbors[offsets[u]:offsets[u + 1]]
+    def csr(self, directed=False):
+        degree = array('i', bytes(4 * (self.V + 1)))
+        edges = self.edges
+        for i in range(0, len(edges), 2):
+            degree[edges[i] + 1] += 1
+            if not directed:
+                degree[edges[i + 1] + 1] += 1
+        for u in range(self.V):
+            degree[u + 1] += degree[u]
+        offsets = array('i', degree)
+        neighbors = array('i', bytes(4 * offsets[self.V]))
+        fill = array('i', offsets)
+        for i in range(0, len(edges), 2):
+            u, v = edges[i], edges[i + 1]
+            neighbors[fill[u]] = v
+            fill[u] += 1
+            if not directed:
+                neighbors[fill[v]] = u
+                fill[v] += 1
+        return offsets, neighbors
+
+
+# Parsed .dimacs CNF file
+class DimacsCNF:
+    def __init__(self, variables, literals, clause_offsets, vertex_ordering):
+        self.variables = variables
+        self.literals = literals
+        self.clause_offsets = clause_offsets
+        self.vertex_ordering = vertex_ordering
+
+    def clause_count(self):
+        return len(self.clause_offsets) - 1
+
+    # Yields every clause as an int32 array of signed, 1-based literals
+    def iter_clauses(self):
+        literals = self.literals
+        offsets = self.clause_offsets
+        for i in range(len(offsets) - 1):
+            yield literals[offsets[i]:offsets[i + 1]]
+
+
+# Parses a DIMACS file, the 'p' line decides if it is a graph ('p edge') or a CNF ('p cnf')
+def read_dimacs(f):
+    kind = None
+    count = None
+    edges = array('i')
+    paths = array('i')
+    path_offsets = array('i', [0])
+    literals = array('i')
+    clause_offsets = array('i', [0])
+    vertex_ordering = array('i')
+
+    with open(f, 'rb') as file:
+        for line in file:
+            first = line[:1]
+            if first == b'c':
+                fields = line.split()
+                if len(fields) < 2:
+                    continue
+                if fields[1] == b'vo':
+                    vertex_ordering = array('i', map(int, fields[2:]))
+                elif fields[1] == b'path':
+                    paths.extend(map(int, fields[2:]))
+                    path_offsets.append(len(paths))
+            elif first == b'p':
+                fields = line.split()
+                kind = fields[1].decode()
+                count = int(fields[2])
+            elif first == b'e':
+                _, u, v = line.split()
+                edges.append(int(u) - 1)
+                edges.append(int(v) - 1)
+            elif line.strip():
+                # clause literals, a 0 closes the clause (clauses may span several lines)
+                for literal in map(int, line.split()):
+                    if literal == 0:
+                        clause_offsets.append(len(literals))
+                    else:
+                        literals.append(literal)
+
+    if kind is None:
+        raise ValueError("No 'p' line found in the DIMACS file.")
+    if kind == 'cnf':
+        if len(literals) != clause_offsets[-1]:
+            # last clause without a closing 0
+            clause_offsets.append(len(literals))
+        return DimacsCNF(count, literals, clause_offsets, vertex_ordering)
+    if literals:
+        raise ValueError(f"Unexpected clause lines in a '{kind}' DIMACS file.")
+    return DimacsGraph(count, edges, paths, path_offsets)
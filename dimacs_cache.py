@@ -0,0 +1,118 @@
+import hashlib
+import mmap
+import os
+import struct
+
+from dimacs import DimacsCNF, DimacsGraph, read_dimacs
+
+# On-disk cache of parsed DIMACS files.
+# The parsed int32 arrays are written as one raw binary file whose name contains the sha256 of the source file,
+# so a changed source never matches an old entry. Warm loads memory-map the file and hand out memoryviews
+# into the mapping, nothing is parsed or copied.
+# The entries live next to this module, one subdirectory per input directory, never inside the input
+# directories themselves: the scripts run over every entry of a data directory.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dimacs_cache')
+MAGIC = b'DIMC'
+VERSION = 1
+# magic, version, kind (0 = graph, 1 = cnf), vertex/variable count, lengths of the three int32 sections
+HEADER = struct.Struct('=4siii3q')
+KIND_GRAPH = 0
+KIND_CNF = 1
+
+
+def file_hash(f):
+    digest = hashlib.sha256()
+    with open(f, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Subdirectory of the cache for the directory of f, named after it and the hash of its absolute path, so
+# files with the same name in different directories (data/*/gcd.col) never replace each other's entries
+def source_dir(f):
+    directory = os.path.dirname(os.path.abspath(f))
+    digest = hashlib.sha256(directory.encode()).hexdigest()[:12]
+    return f'{os.path.basename(directory)}-{digest}'
+
+
+def cache_path(f, digest, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = os.path.join(CACHE_DIR, source_dir(f))
+    return os.path.join(cache_dir, f'{os.path.basename(f)}.{digest}.bin')
+
+
+def write_cache(path, dimacs):
+    if isinstance(dimacs, DimacsGraph):
+        kind, count = KIND_GRAPH, dimacs.V
+        sections = [dimacs.edges, dimacs.paths, dimacs.path_offsets]
+    else:
+        kind, count = KIND_CNF, dimacs.variables
+        sections = [dimacs.literals, dimacs.clause_offsets, dimacs.vertex_ordering]
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # entries of older versions of the same source are stale now. The current entry stays: another process
+    # may have written it already and be loading it, os.replace below swaps it atomically.
+    prefix = os.path.basename(path).rsplit('.', 2)[0] + '.'
+    for name in os.listdir(directory):
+        if name != os.path.basename(path) and name.startswith(prefix) and name.endswith('.bin') and \
+                name.count('.') == prefix.count('.') + 1:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                # removed by another process at the same time
+                pass
+
+    # write to a temporary file first so a crashed run never leaves a half written entry behind
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, kind, count, *(len(s) for s in sections)))
+        for section in sections:
+            file.write(section)
+    os.replace(tmp, path)
+
+
+def load_cache(path):
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < HEADER.size:
+            return None
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, kind, count, *lengths = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != VERSION or HEADER.size + 4 * sum(lengths) != size:
+        return None
+
+    # int32 views into the mapping, the mapping stays open as long as a view refers to it
+    data = memoryview(mapped)[HEADER.size:].cast('i')
+    sections = []
+    start = 0
+    for length in lengths:
+        sections.append(data[start:start + length])
+        start += length
+
+    if kind == KIND_GRAPH:
+        return DimacsGraph(count, *sections)
+    return DimacsCNF(count, *sections)
+
+
+# Drop-in for dimacs.read_dimacs that parses a file only once per content
+def read_dimacs_cached(f, cache_dir=None):
+    path = cache_path(f, file_hash(f), cache_dir)
+    try:
+        dimacs = load_cache(path)
+    except OSError:
+        # no entry yet, or one that cannot be read: parse the file
+        dimacs = None
+    if dimacs is not None:
+        return dimacs
+
+    dimacs = read_dimacs(f)
+    try:
+        write_cache(path, dimacs)
+    except OSError:
+        # a read-only cache directory only costs the cache, not the run
+        pass
+    return dimacs
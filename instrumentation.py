@@ -0,0 +1,122 @@
+import cProfile
+import json
+import os
+import warnings
+from contextlib import contextmanager, nullcontext
+from time import time
+
+# Phase timers and CUDD statistics as structured events.
+# Every event is a dict with the kind of event, the script, the input file and its own fields, and is kept in
+# events, written as one JSON line to out (when given) and printed (when verbose):
+#   phase:    a timed phase of an input (parse, variables, conjoin, count, ...), with a CUDD snapshot of the
+#             manager of the phase at its end. The clauses are built lazily, so conjoin includes building them.
+#   cudd:     a snapshot of a manager: live and peak nodes, cache hit rate, reorderings and reordering time,
+#             every snapshot_every conjunctions during a build (see conjunction.conjoin)
+#   input:    the whole run on one input file
+# With a profile_dir every input file also gets a cProfile dump {profile_dir}/{script}-{file}.prof, to open
+# with pstats or snakeviz. CUDD does not count its garbage collections through dd, so there is no GC field.
+
+
+# bdd.statistics() without the warning about the unit of 'mem', which changed in dd 0.5.7 (it is bytes now)
+def cudd_statistics(bdd):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return bdd.statistics()
+
+
+def cudd_snapshot(bdd):
+    stats = cudd_statistics(bdd)
+    lookups = stats['cache_lookups']
+    return {
+        'live_nodes': stats['n_nodes'],
+        'peak_nodes': stats['peak_nodes'],
+        'peak_live_nodes': stats['peak_live_nodes'],
+        'cache_hit_rate': round(stats['cache_hits'] / lookups, 4) if lookups else None,
+        'reorderings': stats['n_reorderings'],
+        'reordering_seconds': round(stats['reordering_time'], 4),
+        'memory_bytes': stats['mem'],
+    }
+
+
+class Instrumentation:
+    def __init__(self, script, out=None, verbose=False, snapshot_every=None, profile_dir=None):
+        self.script = script
+        self.out = out
+        self.verbose = verbose
+        self.snapshot_every = snapshot_every
+        self.profile_dir = profile_dir
+        self.input = None
+        self.steps = 0
+        self.events = []
+
+    def emit(self, kind, **fields):
+        event = {'event': kind, 'script': self.script, 'input': self.input, **fields}
+        self.events.append(event)
+        if self.out is not None:
+            self.out.write(json.dumps(event) + '\n')
+            self.out.flush()
+        if self.verbose:
+            print(' '.join(f'{key}={value}' for key, value in event.items()))
+        return event
+
+    def snapshot(self, bdd, label):
+        return self.emit('cudd', label=label, **cudd_snapshot(bdd))
+
+    # Times a phase, with a snapshot of bdd at its end when the phase has a manager
+    @contextmanager
+    def phase(self, name, bdd=None):
+        start = time()
+        try:
+            yield
+        finally:
+            fields = cudd_snapshot(bdd) if bdd is not None else {}
+            self.emit('phase', phase=name, seconds=round(time() - start, 6), **fields)
+
+    # Called after every conjunction of a build, takes a snapshot every snapshot_every conjunctions
+    def step(self, bdd):
+        self.steps += 1
+        if self.snapshot_every and self.steps % self.snapshot_every == 0:
+            self.snapshot(bdd, f'after {self.steps} conjunctions')
+
+    # Everything of one input file, profiled when there is a profile_dir
+    @contextmanager
+    def input_file(self, name):
+        self.input = name
+        self.steps = 0
+        profiler = None
+        if self.profile_dir is not None:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time()
+        try:
+            yield
+        finally:
+            seconds = round(time() - start, 6)
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(os.path.join(self.profile_dir, f'{self.script}-{name}.prof'))
+            self.emit('input', seconds=seconds)
+            self.input = None
+
+
+# Phase timer of an optional Instrumentation, nothing is timed without one
+def phase(instrumentation, name, bdd=None):
+    if instrumentation is None:
+        return nullcontext()
+    return instrumentation.phase(name, bdd)
+
+
+# Input file scope of an optional Instrumentation
+def input_file(instrumentation, name):
+    if instrumentation is None:
+        return nullcontext()
+    return instrumentation.input_file(name)
+
+
+# The Instrumentation for the settings of a script, None when neither events nor profiles are asked for
+def from_settings(script, events_path=None, snapshot_every=None, profile_dir=None):
+    if events_path is None and profile_dir is None:
+        return None
+    out = open(events_path, 'a') if events_path is not None else None
+    return Instrumentation(script, out, snapshot_every=snapshot_every, profile_dir=profile_dir)
@@ -0,0 +1,150 @@
+# Marginal model counting on a BDD.
+# For every declared variable x this computes the number of models of a BDD with x true and with x false,
+# counted over all variables of the manager, in one bottom-up and one top-down pass over the nodes.
+
+
+# Level of a node, constants live below the last variable
+def node_level(u, nvars):
+    if u.var is None:
+        return nvars
+    return u.level
+
+
+# The (low, high) cofactors of u, taking a complemented edge into account
+def cofactors(u):
+    low, high = u.low, u.high
+    if u.negated:
+        return ~low, ~high
+    return low, high
+
+
+# Collect the nodes reachable from root, children before parents (no recursion, BDDs can be deep)
+def postorder(bdd, root):
+    order = []
+    seen = set()
+    stack = [(root, False)]
+    while stack:
+        u, expanded = stack.pop()
+        key = int(u)
+        if expanded:
+            order.append(u)
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        if u.var is None:
+            order.append(u)
+            continue
+        stack.append((u, True))
+        low, high = cofactors(u)
+        stack.append((high, False))
+        stack.append((low, False))
+    return order
+
+
+# Number of models of every node, over the variables at or below its level
+def node_counts(bdd, nodes, nvars):
+    count = {}
+    for u in nodes:
+        if u.var is None:
+            count[int(u)] = 1 if u == bdd.true else 0
+            continue
+        level = u.level
+        low, high = cofactors(u)
+        count[int(u)] = (count[int(low)] << (node_level(low, nvars) - level - 1)) + \
+                        (count[int(high)] << (node_level(high, nvars) - level - 1))
+    return count
+
+
+# Returns {var: (negated_count, normal_count)} for every variable of the manager.
+# nodes may be the postorder of u when the caller already has it.
+def marginal_counts(bdd, u, nodes=None):
+    levels = {bdd.level_of_var(var): var for var in bdd.vars}
+    nvars = len(levels)
+
+    if nodes is None:
+        nodes = postorder(bdd, u)
+    count = node_counts(bdd, nodes, nvars)
+
+    positive = [0] * nvars
+    negative = [0] * nvars
+    # free[l] is added to both sides of the variable at level l; stored as a difference array over the levels
+    free = [0] * (nvars + 1)
+
+    # number of assignments of the variables above a node that lead to it
+    root_level = node_level(u, nvars)
+    paths = {int(u): 1 << root_level}
+    total = count[int(u)] << root_level
+    if root_level > 0:
+        free[0] += total >> 1
+        free[root_level] -= total >> 1
+
+    # parents come before their children when going down the levels
+    for node in sorted((n for n in nodes if n.var is not None), key=lambda n: n.level):
+        level = node.level
+        above = paths.get(int(node), 0)
+        if above == 0:
+            continue
+        for child, side in zip(cofactors(node), (negative, positive)):
+            child_level = node_level(child, nvars)
+            gap = child_level - level - 1
+            through = above * (count[int(child)] << gap)
+            side[level] += through
+            if gap > 0:
+                # the skipped variables are free, half of the models through this edge set them to true
+                free[level + 1] += through >> 1
+                free[child_level] -= through >> 1
+            if child.var is not None:
+                paths[int(child)] = paths.get(int(child), 0) + (above << gap)
+
+    result = {}
+    running = 0
+    for level in range(nvars):
+        running += free[level]
+        result[levels[level]] = (negative[level] + running, positive[level] + running)
+    return result
+
+
+# Keeps the nodes, the support and the marginal counts of the current expressions. The nodes come from one
+# traversal after each decision, the support comes from the nodes and the counts are only computed on request.
+class MarginalCounts:
+    def __init__(self, bdd, expressions):
+        self.bdd = bdd
+        self.expressions = expressions
+        self.counts = None
+        self.variables = None
+        self.reachable = None
+        self.passes = 0
+
+    def update(self, expressions):
+        if expressions == self.expressions:
+            # conjoining an implied literal leaves the BDD as it is
+            return
+        self.expressions = expressions
+        self.counts = None
+        self.variables = None
+        self.reachable = None
+
+    def nodes(self):
+        if self.reachable is None:
+            self.reachable = postorder(self.bdd, self.expressions)
+        return self.reachable
+
+    # Every node in the list stays referenced, which slows down CUDD; dropped before the next conjunction
+    def release(self):
+        self.reachable = None
+
+    def refresh(self):
+        self.counts = marginal_counts(self.bdd, self.expressions, self.nodes())
+        self.passes += 1
+
+    def get(self, var):
+        if self.counts is None:
+            self.refresh()
+        return self.counts[var]
+
+    # The support of the expressions, the same set as bdd.support(expressions)
+    def support(self):
+        if self.variables is None:
+            self.variables = {u.var for u in self.nodes() if u.var is not None}
+        return self.variables
@@ -1,44 +1,35 @@
 import os
 
+from bitset_counter import BitsetCounter
+from chromatic import chromatic_number, chromatic_polynomial, evaluate
+from coloring import CSRGraph, color, color_bounds, number_of_colors
+from dimacs_cache import read_dimacs_cached
+from instrumentation import from_settings, input_file, phase
+from tree_decomposition import count_k_colorings, tree_decomposition
+
 # Define a Graph class to represent the graph and perform coloring
 class Graph:
     def __init__(self, vertices):
         self.V = vertices
         self.graph = [[] for _ in range(vertices)]
+        self.polynomial = None
+        self.decomposition = None
 
     def add_edge(self, u, v):
         # Add an edge between vertices u and v in the graph
         self.graph[u].append(v)
         self.graph[v].append(u)
+        self.polynomial = None
+        self.decomposition = None
 
-    def greedy_coloring(self):
-        # Greedy graph coloring algorithm
-        result_colors = [-1] * self.V  # Initialize color assignments
-        result_colors[0] = 0  # Assign the first vertex the first color
-        already_colored = [False] * self.V  # Track available colors
-
-        for u in range(1, self.V):
-            for neighbor in self.graph[u]:
-                # check if neighbor is not colored
-                if result_colors[neighbor] != -1:
-                    # the neighbor should still be colored
-                    already_colored[result_colors[neighbor]] = True
-
-            node_color = 0
-            # find a node that is not colored yet
-            while node_color < self.V:
-                if not already_colored[node_color]:
-                    # we found one that is not yet colored, so this is the number of the next color
-                    break
-                node_color += 1
-
-            result_colors[u] = node_color  # Assign the minimum available color
-            for neighbor in self.graph[u]:
-                # say that the neighbors without colors should still be colored
-                if result_colors[neighbor] != -1:
-                    already_colored[result_colors[neighbor]] = False
+    def greedy_coloring(self, order='natural'):
+        # Number of colors of a greedy coloring, by default in the order 0..V-1 (see coloring.ORDERS)
+        return number_of_colors(color(CSRGraph(self.graph), order))
 
-        return max(result_colors) + 1  # Return the total number of colors used
+    def coloring_bounds(self, time_budget=1.0):
+        # (lower, upper) bound on the number of colors: a clique and the best heuristic coloring
+        lower, upper, _ = color_bounds(self.graph, time_budget)
+        return lower, upper
 
     def is_safe(self, v, c):
         for neighbor in self.graph[v]:
@@ -46,24 +37,30 @@ class Graph:
                 return False
         return True
 
-    def count_mem_k_colorings(self, k, memo, vertex):
-        if vertex == self.V:
-            return 1
-        if (vertex, k) in memo:
-            return memo[(vertex, k)]
-        count = 0
-        for color in range(k):
-            if self.is_safe(vertex, color):
-                self.colors[vertex] = color
-                count += self.count_mem_k_colorings(k, memo, vertex + 1)
-                self.colors[vertex] = -1
-        memo[(vertex, k)] = count
-        return count
+    # Coefficients of the chromatic polynomial, lowest power first, computed once per graph
+    def chromatic_polynomial(self):
+        if self.polynomial is None:
+            self.polynomial = chromatic_polynomial(self.graph)
+        return self.polynomial
 
+    # Number of k-colorings from the chromatic polynomial, remembered across all k
+    # (a memo on (vertex, k) alone ignores the colors already given to the earlier vertices)
     def total_memory_k_colorings(self, k):
-        self.colors = [-1] * self.V
-        memo = {}
-        return self.count_mem_k_colorings(k, memo, 0)
+        return evaluate(self.chromatic_polynomial(), k)
+
+    # Smallest k with a k-coloring, searched downwards from the upper bound
+    def chromatic_number(self, upper_bound):
+        return chromatic_number(self.chromatic_polynomial(), upper_bound)
+
+    # Number of k-colorings by a DP over a tree decomposition, the decomposition is kept across all k
+    def total_treewidth_k_colorings(self, k, heuristic='min_fill'):
+        if self.decomposition is None:
+            self.decomposition = tree_decomposition(self.graph, heuristic)
+        return count_k_colorings(self.graph, k, self.decomposition)
+
+    # Number of k-colorings by bitset backtracking with component splitting and a subproblem cache
+    def total_bitset_k_colorings(self, k):
+        return BitsetCounter(self.graph, k).count()
 
     def count_naive_k_colorings(self, k, vertex=0):
         if vertex == self.V:
@@ -83,27 +80,10 @@ class Graph:
 
 # Function to parse the DIMACS graph file
 def parse_dimacs(f):
-    with open(f, 'r') as file:
-        lines = file.readlines()
+    dimacs = read_dimacs_cached(f)
 
-    vertices = None
-    edges = []
-
-    for line in lines:
-        if line.startswith('c'):
-            # Ignore comments
-            continue
-        elif line.startswith('p'):
-            vertices = int(line.split()[2])
-        elif line.startswith('e'):
-            _, u, v = line.strip().split()
-            edges.append((int(u) - 1, int(v) - 1))
-
-    if vertices is None:
-        raise ValueError("No 'p' line found in the DIMACS file.")
-
-    g = Graph(vertices)
-    for u, v in edges:
+    g = Graph(dimacs.V)
+    for u, v in dimacs.iter_edges():
         g.add_edge(u, v)  # Add edges to the graph
     return g
 
@@ -115,23 +95,55 @@ if __name__ == '__main__':
     # Specify the DIMACS graph file you want to analyze
     gcd_file = f"{dir_str}gcd.col"
 
+    # Counting mode: bitset (DSatur backtracking with component splitting and caching per k), polynomial
+    # (chromatic polynomial, every k at once, fast on less-dimacs but not within minutes on mulsol-small)
+    # or treewidth (tree decomposition DP per k, falls back to bitset when the tables are too large)
+    counting = "bitset"
+    # Seconds spent on improving the heuristic coloring (iterated greedy and tabu search)
+    coloring_budget = 1.0
+    # Phase timers as JSON lines appended to events_path (None: off) and a cProfile dump per input file in
+    # profile_dir (None: off)
+    events_path = None
+    profile_dir = None
+    instrumentation = from_settings("naive_approach", events_path, profile_dir=profile_dir)
+
     # Get a list of files in the directory
     directory = os.fsencode(dir_str)
 
     for file in os.listdir(directory):
         filename = os.fsdecode(file)
+        # skip hidden entries, only the input files are parsed
+        if filename.startswith('.'):
+            continue
 
-        # Parse the DIMACS file and create the graph
-        graph = parse_dimacs(f"{dir_str}{filename}")
-
-        # Find the minimum number of registers required using greedy coloring
-        min_registers = graph.greedy_coloring()
-        print(f"Minimum number of registers required for {filename}: {min_registers}")
-
-        # Use the minimum number of registers as the upper bound for k
-
-        colors_k = min_registers
-        total_colorings = graph.total_naive_k_colorings(colors_k)
-        total_mem_colorings = graph.total_memory_k_colorings(colors_k)
-
-        print(f"Total number of different {colors_k}-colorings: {total_colorings}")
+        with input_file(instrumentation, filename):
+            # Parse the DIMACS file and create the graph
+            with phase(instrumentation, 'graph'):
+                graph = parse_dimacs(f"{dir_str}{filename}")
+
+            # Bound the minimum number of registers required by a clique and the best heuristic coloring
+            with phase(instrumentation, 'bounds'):
+                lower_bound, min_registers = graph.coloring_bounds(coloring_budget)
+            print(f"Minimum number of registers required for {filename}: {min_registers} (lower bound {lower_bound})")
+
+            # Sweep k downwards from the upper bound until there are no k-colorings left, no k below the lower bound
+            # can have one (total_naive_k_colorings gives the same numbers by enumerating every coloring)
+            count = {"polynomial": graph.total_memory_k_colorings,
+                     "treewidth": graph.total_treewidth_k_colorings,
+                     "bitset": graph.total_bitset_k_colorings}[counting]
+            colors_k = min_registers
+            chromatic_k = colors_k
+            for k in range(colors_k, lower_bound - 1, -1):
+                with phase(instrumentation, f'count {k}'):
+                    try:
+                        total_colorings = count(k)
+                    except ValueError as error:
+                        # the tables of the tree decomposition DP are too large for this graph
+                        print(f"{error}, counting with bitset instead")
+                        count = graph.total_bitset_k_colorings
+                        total_colorings = count(k)
+                if total_colorings == 0:
+                    break
+                chromatic_k = k
+                print(f"Total number of different {k}-colorings: {total_colorings}")
+            print(f"Chromatic number of {filename}: {chromatic_k}")
@@ -0,0 +1,195 @@
+import heapq
+from collections import deque
+
+from dimacs import DimacsGraph
+
+# Static variable orderings, computed from the structure of a graph or CNF before any BDD variable is declared.
+# All orders are lists of 0-based indices: vertices for a .col graph, variables (x{i + 1}) for a CNF.
+#   natural:       0..n-1, the order of the file
+#   cuthill_mckee: BFS from a peripheral vertex, neighbours by increasing degree (bandwidth reduction)
+#   force:         FORCE, vertices move to the mean center of gravity of the edges/clauses they are in
+#   min_degree:    reversed min-degree elimination order, the first eliminated vertex ends up at the bottom
+
+ORDERINGS = ['natural', 'cuthill_mckee', 'force', 'min_degree']
+
+
+# Adjacency lists without duplicates or self loops
+def graph_adjacency(graph):
+    offsets, neighbors = graph.csr()
+    adjacency = []
+    for u in range(graph.V):
+        adjacency.append(sorted(set(neighbors[offsets[u]:offsets[u + 1]]) - {u}))
+    return adjacency
+
+
+# Hyperedges of a graph (its edges) or a CNF (the variables of every clause)
+def hyperedges(source):
+    if isinstance(source, DimacsGraph):
+        return [[u, v] for u, v in source.iter_edges() if u != v]
+    return [sorted({abs(lit) - 1 for lit in clause}) for clause in source.iter_clauses()]
+
+
+# Primal graph of a CNF, two variables are adjacent when they share a clause
+def cnf_adjacency(cnf):
+    adjacency = [set() for _ in range(cnf.variables)]
+    for edge in hyperedges(cnf):
+        for v in edge:
+            adjacency[v].update(edge)
+    for v in range(cnf.variables):
+        adjacency[v].discard(v)
+    return [sorted(neighbors) for neighbors in adjacency]
+
+
+def adjacency_of(source):
+    if isinstance(source, DimacsGraph):
+        return graph_adjacency(source)
+    return cnf_adjacency(source)
+
+
+def bfs_levels(adjacency, start):
+    depth = {start: 0}
+    queue = deque([start])
+    last = start
+    while queue:
+        u = queue.popleft()
+        last = u
+        for v in adjacency[u]:
+            if v not in depth:
+                depth[v] = depth[u] + 1
+                queue.append(v)
+    return depth, last
+
+
+# Start of a Cuthill-McKee sweep: repeat BFS from the farthest vertex until the eccentricity stops growing
+def peripheral_vertex(adjacency, start):
+    depth, last = bfs_levels(adjacency, start)
+    eccentricity = depth[last]
+    while True:
+        next_depth, next_last = bfs_levels(adjacency, last)
+        if next_depth[next_last] <= eccentricity:
+            return last
+        eccentricity = next_depth[next_last]
+        last = next_last
+
+
+def cuthill_mckee_order(adjacency):
+    n = len(adjacency)
+    degree = [len(neighbors) for neighbors in adjacency]
+    visited = [False] * n
+    order = []
+    # every connected component gets its own sweep, lowest degree components first
+    for start in sorted(range(n), key=lambda v: degree[v]):
+        if visited[start]:
+            continue
+        root = peripheral_vertex(adjacency, start)
+        visited[root] = True
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            order.append(u)
+            for v in sorted(adjacency[u], key=lambda w: degree[w]):
+                if not visited[v]:
+                    visited[v] = True
+                    queue.append(v)
+    return order
+
+
+# Sum of the spans (last position - first position) of all hyperedges, the cost FORCE minimizes
+def total_span(edges, position):
+    span = 0
+    for edge in edges:
+        if edge:
+            places = [position[v] for v in edge]
+            span += max(places) - min(places)
+    return span
+
+
+def force_order(n, edges, initial=None, iterations=50):
+    order = list(range(n)) if initial is None else list(initial)
+    position = [0] * n
+    for place, v in enumerate(order):
+        position[v] = place
+    best_order, best_span = order, total_span(edges, position)
+
+    memberships = [[] for _ in range(n)]
+    for e, edge in enumerate(edges):
+        for v in edge:
+            memberships[v].append(e)
+
+    for _ in range(iterations):
+        gravity = [sum(position[v] for v in edge) / len(edge) if edge else 0.0 for edge in edges]
+        tentative = [sum(gravity[e] for e in memberships[v]) / len(memberships[v]) if memberships[v]
+                     else position[v] for v in range(n)]
+        order = sorted(range(n), key=lambda v: (tentative[v], position[v]))
+        for place, v in enumerate(order):
+            position[v] = place
+        span = total_span(edges, position)
+        if span >= best_span:
+            break
+        best_order, best_span = order, span
+    return best_order
+
+
+# Elimination order of a graph, every step removes the vertex with the lowest degree (min_degree)
+# or the one adding the fewest fill edges (min_fill) and connects its neighbours
+def elimination_order(adjacency, heuristic='min_degree'):
+    n = len(adjacency)
+    neighbors = [set(adj) for adj in adjacency]
+    eliminated = [False] * n
+
+    def score(v):
+        if heuristic == 'min_degree':
+            return len(neighbors[v])
+        nbrs = list(neighbors[v])
+        missing = 0
+        for i, a in enumerate(nbrs):
+            for b in nbrs[i + 1:]:
+                if b not in neighbors[a]:
+                    missing += 1
+        return missing
+
+    heap = [(score(v), v) for v in range(n)]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        s, v = heapq.heappop(heap)
+        if eliminated[v] or s != score(v):
+            # stale entry, the vertex was eliminated or its score changed
+            if not eliminated[v]:
+                heapq.heappush(heap, (score(v), v))
+            continue
+        eliminated[v] = True
+        order.append(v)
+        nbrs = neighbors[v]
+        for a in nbrs:
+            neighbors[a].discard(v)
+            neighbors[a].update(b for b in nbrs if b != a)
+        touched = set(nbrs)
+        if heuristic == 'min_fill':
+            # the fill of a vertex also changes when two of its neighbours got connected
+            for a in nbrs:
+                touched.update(neighbors[a])
+        for a in touched:
+            if not eliminated[a]:
+                heapq.heappush(heap, (score(a), a))
+        neighbors[v] = set()
+    return order
+
+
+def min_degree_order(adjacency):
+    return elimination_order(adjacency)[::-1]
+
+
+# Order of the vertices of a graph or the variables of a CNF, as 0-based indices
+def compute_order(source, method='natural'):
+    n = source.V if isinstance(source, DimacsGraph) else source.variables
+    if method == 'natural':
+        return list(range(n))
+    if method == 'cuthill_mckee':
+        return cuthill_mckee_order(adjacency_of(source))
+    if method == 'force':
+        # FORCE converges faster from a Cuthill-McKee start than from the file order
+        return force_order(n, hyperedges(source), cuthill_mckee_order(adjacency_of(source)))
+    if method == 'min_degree':
+        return min_degree_order(adjacency_of(source))
+    raise ValueError(f"Unknown variable ordering '{method}', choose one of {ORDERINGS}")
@@ -4,184 +4,103 @@ import time
 
 from dd.cudd import BDD
 
+from bdd_cache import build_cached
+from bdd_clauses import dimacs_clause
+from configuration import Configuration
+from conjunction import conjoin
+from decisions import DECISIONS, configure
+from dimacs_cache import read_dimacs_cached
+from instrumentation import from_settings, input_file, phase
+from ordering import compute_order
+from reordering import ReorderConfig
+from sampling import write_samples
+
 # Function to parse the DIMACS graph file
-from tqdm import tqdm
-
-
-def parse_dimacs(f, bdd_dimacs):
-    with open(f, 'r') as file:
-        lines = file.readlines()
-
-    vertex_ordering = []
-    u = bdd_dimacs.true
-    # read the lines of the dimacs file
-    for line in lines:
-        # ignore comments unless its a vertex ordering
-        if line.startswith('c'):
-            if line.split()[1] == 'vo':
-                vertex_ordering = line.strip().split()[2:]
-                print("Size;", len(vertex_ordering))
-            continue
-        # add the variables when the line with the number of vertices is found
-        elif line.startswith('p'):
-            vertices = int(line.split()[2])
-            if len(vertex_ordering) == 0:
-                for vertex in range(1, vertices + 1):
-                    bdd_dimacs.add_var(f'x{vertex}')
-                    vertex_ordering.append(vertex-1)
-            else:
-                for vertex in range(1, vertices + 1):
-                    bdd_dimacs.add_var(f'x{vertex}')
-        # add the expressions
+
+
+def parse_dimacs(f, bdd_dimacs, strategy='linear', ordering='natural', reordering=None, cache=False,
+                 instrumentation=None):
+    with phase(instrumentation, 'parse'):
+        dimacs = read_dimacs_cached(f)
+    if reordering is not None:
+        reordering.setup(bdd_dimacs)
+
+    vertex_ordering = dimacs.vertex_ordering.tolist()
+    if len(vertex_ordering) > 0:
+        print("Size;", len(vertex_ordering))
+    # without a vertex ordering the features are configured in the order 1..n
+    if len(vertex_ordering) == 0:
+        vertex_ordering = list(range(1, dimacs.variables + 1))
+
+    def build(bdd):
+        # add the variables, in the order of the 'c vo' line or in a static ordering computed from the clauses
+        if ordering == 'vo':
+            declared = [vertex - 1 for vertex in vertex_ordering]
+            declared += sorted(set(range(dimacs.variables)) - set(declared))
         else:
-            # remove the zero at the end
-            variables = line.strip().split()[:-1]
-            # create the expression
-            disjunction = []
-            for v in variables:
-                # negations
-                if v.startswith('-'):
-                    disjunction.append(f'~x{v[1:]}')
-                # positive
-                else:
-                    disjunction.append(f'x{v}')
-            # add the expression to the bdd
-            expression = f'({" | ".join(disjunction)})'
-            u &= bdd_dimacs.add_expr(expression)
+            declared = compute_order(dimacs, ordering)
+        for vertex in declared:
+            bdd.add_var(f'x{vertex + 1}')
+
+        # add the expressions, ~x{v} for negative literals. They are built lazily, so the linear schedule
+        # conjoins every clause right after building it and reordering never sifts all clause BDDs at once.
+        clauses = (dimacs_clause(bdd, clause) for clause in dimacs.iter_clauses())
+        # conjoin them in the order given by the strategy
+        with phase(instrumentation, 'conjoin', bdd):
+            u, stats = conjoin(bdd, clauses, strategy, reordering, instrumentation)
+        print(stats)
+        return u
+
+    # a BDD dumped by an earlier run (or another worker) for the same file and ordering is loaded instead
+    if cache:
+        with phase(instrumentation, 'cache', bdd_dimacs):
+            u, loaded = build_cached(f, bdd_dimacs, ordering, build)
+        if loaded:
+            print(f"Loaded the BDD of {f} from the cache")
+    else:
+        u = build(bdd_dimacs)
 
     # do model counting and return the vertex ordering
     return bdd_dimacs, u, vertex_ordering
 
 
-def auto_include(bdd, expressions, order, auto_func, dimacs_name):
-    f = open(f"./final_configurations2/{dimacs_name}-{auto_func}.txt", "w")
-    added = 0
-    negated_added = 0
-    test_bdd = BDD()
-    [test_bdd.add_var(var) for var in bdd.vars]
-    # always include
-    if auto_func == "a":
-        for node in tqdm(order):
-            feat = f'x{node}'
-            negated_feat = f'~x{node}'
-            if feat in bdd.support(expressions):
-                negated_count, normal_count = get_model_counts(test_bdd, expressions, feat, bdd, negated_feat)
-                if normal_count > 0:
-                    f.write(f"Including {feat}\n")
-                    added += 1
-                    expressions &= bdd.add_expr(feat)
-                elif negated_count > 0:
-                    f.write(f"Excluding {feat}\n")
-                    negated_added += 1
-                    expressions &= bdd.add_expr(negated_feat)
-                else:
-                    f.write(f"Count {feat} is {normal_count}, {negated_count}")
-                    print(f"Count {feat} is {normal_count}, {negated_count}")
-    # always exclude
-    elif auto_func == "b":
-        for node in order:
-            feat = f'x{node}'
-            negated_feat = f'~x{node}'
-            if feat in bdd.support(expressions):
-                negated_count, normal_count = get_model_counts(test_bdd, expressions, feat, bdd, negated_feat)
-                if negated_count > 0:
-                    f.write(f"Excluding {feat}\n")
-                    negated_added += 1
-                    expressions &= bdd.add_expr(negated_feat)
-                elif normal_count > 0:
-                    f.write(f"Including {feat}\n")
-                    added += 1
-                    expressions &= bdd.add_expr(feat)
-                else:
-                    f.write(f"Count {feat} is {normal_count}, {negated_count}")
-                    print(f"Count {feat} is {normal_count}, {negated_count}")
-    # always include if leads to more valid configurations
-    elif auto_func == "c":
-        for node in tqdm(order):
-            feat = f'x{node}'
-            negated_feat = f'~x{node}'
-            if feat in bdd.support(expressions):
-                negated_count, normal_count = get_model_counts(test_bdd, expressions, feat, bdd, negated_feat)
-                if normal_count > negated_count:
-                    f.write(f"Including {feat}\n")
-                    added += 1
-                    expressions &= bdd.add_expr(feat)
-                elif negated_count > 0:
-                    f.write(f"Excluding {feat}\n")
-                    negated_added += 1
-                    expressions &= bdd.add_expr(negated_feat)
-                else:
-                    f.write(f"Count {feat} is {normal_count}, {negated_count}")
-                    print(f"Count {feat} is {normal_count}, {negated_count}")
-    # always exclude if leads to more valid configurations
-    elif auto_func == "d":
-        for node in tqdm(order):
-            feat = f'x{node}'
-            negated_feat = f'~x{node}'
-            if feat in bdd.support(expressions):
-                negated_count, normal_count = get_model_counts(test_bdd, expressions, feat, bdd, negated_feat)
-                if negated_count > normal_count:
-                    f.write(f"Excluding {feat}\n")
-                    negated_added += 1
-                    expressions &= bdd.add_expr(negated_feat)
-                elif normal_count > 0:
-                    f.write(f"Including {feat}\n")
-                    added += 1
-                    expressions &= bdd.add_expr(feat)
-                else:
-                    f.write(f"Count {feat} is {normal_count}, {negated_count}")
-                    print(f"Count {feat} is {normal_count}, {negated_count}")
+def auto_include(bdd, expressions, order, auto_func, dimacs_name, output_dir="."):
+    configurations = os.path.join(output_dir, "final_configurations2")
+    os.makedirs(configurations, exist_ok=True)
+    f = open(os.path.join(configurations, f"{dimacs_name}-{auto_func}.txt"), "w")
+    # the features that a decision implies (the backbone) are assigned right away, the strategy picks the
+    # other decisions (see decisions.STRATEGIES)
+    config = Configuration(bdd, expressions, [f'x{node}' for node in order], f)
+    config.propagate()
+    if auto_func in DECISIONS:
+        configure(config, auto_func)
     # interactive mode
     else:
-        added, expressions, negated_added = interactive_mode(added, test_bdd, expressions, f, bdd, negated_added, order)
-    return bdd, expressions, [added, negated_added], f
+        interactive_mode(config, order)
+    return bdd, config.expressions, [config.added, config.negated_added], f
 
 
-def interactive_mode(added, test_bdd, expressions, f, bdd, negated_added, order):
+def interactive_mode(config, order):
     for node in order:
         feat = f'x{node}'
-        negated_feat = f'~x{node}'
-        if feat in bdd.support(expressions):
-            negated_count, normal_count = get_model_counts(test_bdd, expressions, feat, bdd, negated_feat)
-            if normal_count == 0:
-                f.write(f"Excluding {feat}\n")
-                negated_added += 1
-                expressions &= bdd.add_expr(negated_feat)
-                print(f"Excluded {feat} to prevent model count being 0")
-                continue
-            if negated_count == 0:
-                f.write(f"Including {feat}\n")
-                added += 1
-                expressions &= bdd.add_expr(feat)
-                print(f"Included {feat} to prevent model count being 0")
-                continue
+        if config.is_open(feat):
+            negated_count, normal_count = config.counts(feat)
             include = input(f"Include {feat}? (y/n)\n" +
                          f"Valid configurations if positive: {normal_count}; if negative: {negated_count}\n")
-            if "y" in include.lower():
-                f.write(f"Including {feat}\n")
-                added += 1
-                expressions &= bdd.add_expr(feat)
-            else:
-                f.write(f"Excluding {feat}\n")
-                negated_added += 1
-                expressions &= bdd.add_expr(negated_feat)
-    return added, expressions, negated_added
-
-
-def get_model_counts(test_bdd, expressions, feat, bdd, negated_feat):
-    v = bdd.copy(expressions, test_bdd)
-    v &= test_bdd.add_expr(feat)
-    normal_count = test_bdd.count(v)
-
-    v = bdd.copy(expressions, test_bdd)
-    v &= test_bdd.add_expr(negated_feat)
-    negated_count = test_bdd.count(v)
-    return negated_count, normal_count
+            implied = config.decide(feat, "y" in include.lower())
+            for implied_feat, value in implied:
+                if value:
+                    print(f"Included {implied_feat} to prevent model count being 0")
+                else:
+                    print(f"Excluded {implied_feat} to prevent model count being 0")
 
 
-def print_choice(choice, fname, bdd, expressions, ordering):
+# Runs one strategy and writes its configuration to final_configurations2/ and dimacs2/ inside output_dir,
+# the repository root by default (the tracked results), a scratch directory for batch and benchmark runs
+def print_choice(choice, fname, bdd, expressions, ordering, instrumentation=None, output_dir="."):
     start_time = time.time()
-    bdd, expressions, add_arr, out_file = auto_include(bdd, expressions, ordering, choice, fname)
+    with phase(instrumentation, f'configure {choice}', bdd):
+        bdd, expressions, add_arr, out_file = auto_include(bdd, expressions, ordering, choice, fname, output_dir)
     # state the overall execution time, the final configuration, and the number of configuration steps made
     exec_time = time.time() - start_time
     print(f"Execution time of {fname}-{choice}: {exec_time} seconds")
@@ -194,8 +113,10 @@ def print_choice(choice, fname, bdd, expressions, ordering):
                    f"of which positive: {add_arr[0]}, negative: {add_arr[1]}\n")
     out_file.close()
 
-    convert_to_dimacs(os.path.join("final_configurations2", f"{fname}-{choice}.txt"),
-                      os.path.join("dimacs2", f"{fname.rstrip('.dimacs')}-{choice}.dimacs"))
+    os.makedirs(os.path.join(output_dir, "dimacs2"), exist_ok=True)
+    convert_to_dimacs(os.path.join(output_dir, "final_configurations2", f"{fname}-{choice}.txt"),
+                      os.path.join(output_dir, "dimacs2", f"{fname.rstrip('.dimacs')}-{choice}.dimacs"))
+    return exec_time, add_arr
 
 
 def convert_to_dimacs(input_file, output_file):
@@ -228,26 +149,57 @@ if __name__ == '__main__':
 (c) Always include a feature if this feature would lead to more valid configurations than possible when excluding it (under the assumption of the already configured features).
 (d) Always exclude a feature if this feature would lead to more valid configurations than possible when including it (under the assumption of the already configured features).
 (e) interactive mode, for each possible decision in a step the number of valid configurations after the decision will be displayed.
+(max_configurations) Take the decision over all open features that keeps the most valid configurations.
+(min_size) Take the decision over all open features that leaves the smallest BDD.
 """)
+    # Strategies run by "all", max_configurations and min_size (decisions.STRATEGIES) are chosen by name
     auto_choices = ["a", "b", "c", "d"]
+    # Order in which the clauses are conjoined: linear, balanced, cluster or smallest
+    conjunction_strategy = "linear"
+    # Order of the BDD variables: natural (x1..xn), vo (the 'c vo' line), cuthill_mckee, force or min_degree
+    variable_ordering = "natural"
+    # Dynamic reordering and forced sifts during construction, e.g. ReorderConfig(dynamic=False, sift_every=200)
+    reordering = ReorderConfig()
+    # Keep the built BDDs as DDDMP dumps in .bdd_cache/, later runs load them instead of conjoining again
+    bdd_cache = True
+    # Uniform random valid configurations per feature model, written to dimacs2/{name}-samples.dimacs (0 for none)
+    samples = 0
+    sample_seed = None
+    # Phase timers and CUDD snapshots as JSON lines appended to events_path (None: off), a snapshot every
+    # snapshot_every conjunctions, and a cProfile dump per input file in profile_dir (None: off)
+    events_path = None
+    snapshot_every = 1000
+    profile_dir = None
+    instrumentation = from_settings("problem2", events_path, snapshot_every, profile_dir)
 
     sys.setrecursionlimit(2500)
     for f in os.listdir(directory):
+        filename = os.fsdecode(f)
+        # skip hidden entries, only the input files are parsed
+        if filename.startswith('.'):
+            continue
         # Initialize the BDD manager
         bdd = BDD()
-        filename = os.fsdecode(f)
         file = os.path.join(os.fsdecode(directory), filename)
 
-        # Parse the DIMACS file and create the graph
-        print(f"Bdd {file}, {filename}: In progress...")
-        bdd, expressions, vo = parse_dimacs(f"{file}", bdd)
-        print(f"bdd model count {filename}: {bdd.count(expressions)}")
-        # easy to run everything; change auto_choice to choice as well :)
-        if auto_choice == "all":
-            for choice in auto_choices:
-                print_choice(choice, filename, bdd, expressions, vo)
-        else:
-            print_choice(auto_choice, filename, bdd, expressions, vo)
+        with input_file(instrumentation, filename):
+            # Parse the DIMACS file and create the graph
+            print(f"Bdd {file}, {filename}: In progress...")
+            bdd, expressions, vo = parse_dimacs(f"{file}", bdd, conjunction_strategy, variable_ordering, reordering,
+                                                bdd_cache, instrumentation)
+            with phase(instrumentation, 'count', bdd):
+                print(f"bdd model count {filename}: {bdd.count(expressions)}")
+            if samples > 0:
+                with phase(instrumentation, 'sample', bdd):
+                    write_samples(bdd, expressions,
+                                  os.path.join("dimacs2", f"{filename.rstrip('.dimacs')}-samples.dimacs"),
+                                  samples, sample_seed)
+            # easy to run everything; change auto_choice to choice as well :)
+            if auto_choice == "all":
+                for choice in auto_choices:
+                    print_choice(choice, filename, bdd, expressions, vo, instrumentation)
+            else:
+                print_choice(auto_choice, filename, bdd, expressions, vo, instrumentation)
 
         # Find the minimum number of registers required using greedy coloring
         print(f"Bdd {filename}: Done")
@@ -1,9 +1,14 @@
 import os
-import re
 from dd.cudd import BDD
 from time import time
 
-# Define a Graph class to represent the graph and perform coloring
+from bdd_clauses import bits_cube, disjunction, less_than
+from dimacs_cache import read_dimacs_cached
+from instrumentation import from_settings, input_file, phase
+from reachability import PartitionedTransitionSystem, TransitionSystem
+from reordering import ReorderConfig
+
+# Define a Graph class to represent the directed transition graph
 class Graph:
     def __init__(self, vertices):
         self.V = vertices
@@ -13,142 +18,101 @@ class Graph:
         # Add an edge between vertices u and v in the graph
         self.graph[u].append(v)
 
-    def greedy_coloring(self):
-        # Greedy graph coloring algorithm
-        result_colors = [-1] * self.V  # Initialize color assignments
-        result_colors[0] = 0  # Assign the first vertex the first color
-        already_colored = [False] * self.V  # Track available colors
-
-        for u in range(1, self.V):
-            for neighbor in self.graph[u]:
-                # check if neighbor is not colored
-                if result_colors[neighbor] != -1:
-                    # the neighbor should still be colored
-                    already_colored[result_colors[neighbor]] = True
-
-            node_color = 0
-            # find a node that is not colored yet
-            while node_color < self.V:
-                if not already_colored[node_color]:
-                    # we found one that is not yet colored, so this is the number of the next color
-                    break
-                node_color += 1
-
-            result_colors[u] = node_color  # Assign the minimum available color
-            for neighbor in self.graph[u]:
-                # say that the neighbors without colors should still be colored
-                if result_colors[neighbor] != -1:
-                    already_colored[result_colors[neighbor]] = False
-
-        return max(result_colors) + 1  # Return the total number of colors used
-
 
 # Function to parse the DIMACS graph file
 def parse_dimacs(f):
-    with open(f, 'r') as file:
-        lines = file.readlines()
-
-    vertices = None
-    edges = []
-    paths = []
-
-    for line in lines:
-        if line.startswith('c'):
-            if line.split()[1] == 'path':
-                path = [int(num) for num in line.strip().split()[2:]]
-                paths.append(path)
-            # Ignore comments
-            continue
-        elif line.startswith('p'):
-            vertices = int(line.split()[2])
-        elif line.startswith('e'):
-            _, u, v = line.strip().split()
-            edges.append((int(u) - 1, int(v) - 1))
-
-    if vertices is None:
-        raise ValueError("No 'p' line found in the DIMACS file.")
+    dimacs = read_dimacs_cached(f)
 
-    g = Graph(vertices)
-    for u, v in edges:
+    g = Graph(dimacs.V)
+    for u, v in dimacs.iter_edges():
         g.add_edge(u, v)  # Add edges to the graph
-    return g, paths
+    return g, list(dimacs.iter_paths())
 
-# Creates the bdd
-def create_bdd(graph):
-    # Initialize bdd and result to check later
+# Creates the manager with the state bits, returns it with the names of the current and the primed bits
+def state_manager(graph, reordering=None):
     bdd = BDD()
-    result = bdd.true
+    if reordering is not None:
+        reordering.setup(bdd)
 
     bin_vertex_nr = (graph.V - 1).bit_length()
 
-    # Add all variables, only need bin_vertex_nr since we use the bit-encoding
+    # Add all variables, only need bin_vertex_nr since we use the bit-encoding.
+    # x_i and x_i_prime are declared next to each other, so a transition only relates neighbouring levels.
     for i in range(bin_vertex_nr):
         bdd.add_var(f'x_{i}')
         bdd.add_var(f'x_{i}_prime')
 
-    xor_clauses = []
-    # Loop over all vertices in the adjacency list and create all transition clauses accordingly
-    for i in range(len(graph.graph)):
-        from_vertex = bin(i)[2:]
-        from_vertex = f'{from_vertex.zfill(bin_vertex_nr)}'
-        for j in range(len(graph.graph[i])):
-            to_vertex = bin(graph.graph[i][j])[2:]
-            to_vertex = f'{to_vertex.zfill(bin_vertex_nr)}'
-            
-            clause = []
-            number = 0
-            # Create states x_0, !x_1, ....
-            for nr in from_vertex:
-                clause.append(f'!x_{number}' if nr=="0" else f'x_{number}')
-                number+=1
-            
-            number = 0
-            # Create states x_0_prime, !x_1_prime, ....
-            for nr in to_vertex:
-                clause.append(f'!x_{number}_prime' if nr=="0" else f'x_{number}_prime')
-                number+=1
-            
-            # Transition from state to state (x_0 & !x_1 & x_2 & x3 & x_0_prime & !x_1_prime & x_2_prime & x3_prime)
-            big_clause = "(" + ' & '.join(clause) + ")"
-            xor_clauses.append(big_clause)
-            print(big_clause)
-            
-    # XOr everything
-    result = bdd.add_expr("(" + ' ^ '.join(xor_clauses) + ")")
-
-    bit_max = bin_vertex_nr**2
-    
-    # Add that states that can be made with the bit-encoding, but are not vertices in the transition diagram
-    # !(x_0 & x_1 & x_2 & !x_3) & !(x_0 & x_1 & x_2 & x_3) & ....
-    for i in range(graph.V, bit_max):
-        clause = []
-        bit_nr = bin(i)[2:]
-        var = 0
-        for nr in bit_nr:
-            clause.append(f'!x_{var}' if nr=="0" else f'x_{var}')
-            var+=1
-
-        big_clause = '!(' + ' & '.join(clause) + ')'
-        print(big_clause)
-        result &= bdd.add_expr(big_clause)
-    
+    current = [f'x_{i}' for i in range(bin_vertex_nr)]
+    primed = [f'x_{i}_prime' for i in range(bin_vertex_nr)]
+    # A bit and its primed copy move together when sifting
+    if reordering is not None:
+        reordering.group_blocks(bdd, list(zip(current, primed)))
+    return bdd, current, primed
+
+
+# The transitions out of the given source vertices. A source is encoded in the last len(source_bits) bits
+# of its number, so the bits above them can be left to the caller.
+# One partition per source vertex: its cube (x_0 & !x_1 & ...) and the disjunction of the cubes of its
+# successors on the primed bits. The partitions are disjoint and joined in a balanced disjunction tree,
+# so no | ever adds one small cube to the whole relation.
+def source_relation(bdd, graph, sources, source_bits, primed, reordering=None, instrumentation=None):
+    mask = (1 << len(source_bits)) - 1
+    partitions = []
+    for i in sources:
+        if not graph.graph[i]:
+            continue
+        successors = disjunction(bdd, [bits_cube(bdd, primed, j) for j in sorted(set(graph.graph[i]))])
+        partitions.append(bits_cube(bdd, source_bits, i & mask) & successors)
+        if reordering is not None:
+            reordering.step(bdd)
+        if instrumentation is not None:
+            instrumentation.step(bdd)
+    return disjunction(bdd, partitions)
+
+
+# Creates the bdd of the transition relation T(x, x'), vertex v is the state with number v in the bits
+def create_bdd(graph, reordering=None, instrumentation=None):
+    bdd, current, primed = state_manager(graph, reordering)
+    with phase(instrumentation, 'relation', bdd):
+        result = source_relation(bdd, graph, range(graph.V), current, primed, reordering, instrumentation)
+
+        # The codes V..2**bin_vertex_nr-1 are no vertices, neither as source nor as target
+        result &= less_than(bdd, current, graph.V) & less_than(bdd, primed, graph.V)
+
+    if reordering is not None:
+        reordering.finish(bdd)
     return bdd, result
 
 
-def check_path(bdd, result, paths):
+# Creates the transition relation as clusters of source vertices that share their first cluster_bits bits,
+# without ever building the whole relation. Returns the manager, {prefix: R_prefix} and cluster_bits, where
+# R_prefix only holds the remaining source bits and the primed bits (see reachability.PartitionedTransitionSystem).
+# By default a cluster holds up to 256 source vertices.
+def create_partitions(graph, cluster_bits=None, reordering=None, instrumentation=None):
+    bdd, current, primed = state_manager(graph, reordering)
+    if cluster_bits is None:
+        cluster_bits = max(0, len(current) - 8)
+    cluster_bits = min(cluster_bits, len(current))
+
+    shift = len(current) - cluster_bits
+    partitions = {}
+    with phase(instrumentation, 'partitions', bdd):
+        for prefix in range(((graph.V - 1) >> shift) + 1):
+            sources = range(prefix << shift, min(graph.V, (prefix + 1) << shift))
+            relation = source_relation(bdd, graph, sources, current[cluster_bits:], primed, reordering,
+                                       instrumentation)
+            if relation != bdd.false:
+                partitions[prefix] = relation
+
+    if reordering is not None:
+        reordering.finish(bdd)
+    return bdd, partitions, cluster_bits
+
+
+# Checks the paths (1-based vertices) on a transition system, the steps are point evaluations
+def report_paths(system, paths):
     passes = 0
-    for path in paths:
-        max_path_node = max(path) - 1
-        degree = max_path_node.bit_length()  # Automatically detect the binary degree
-        states = []
-        for p in path:
-            state_bits = bin(p-1)[2:]
-            bit_string = f'{state_bits.zfill(degree)}'
-            state = []
-            for i in range(len(bit_string)):
-                state.append(f'x_{i}' if bit_string[i] == "1" else f'!x_{i}')
-            states.append(' & '.join(state))
-        success = check_trace(bdd, result, states)
+    for path, success in zip(paths, system.check_paths(paths)):
         if success:
             passes += 1
             print(f"{path} is possible")
@@ -157,23 +121,9 @@ def check_path(bdd, result, paths):
     return passes
 
 
-def check_trace(bdd, result, states):
-    test_bdd = BDD()
-    [test_bdd.add_var(var) for var in bdd.vars]
-    # test_expression = bdd.copy(result, test_bdd)
-    for i in range(len(states)-1):
-        test_expression = bdd.copy(result, test_bdd)
-        state = states[i]
-        try:
-            test_expression &= test_bdd.add_expr(fr'{state}')
-        except ValueError:
-            return False
-        next_state = re.sub(r'x_(\d+)', lambda match: f'x_{match.group(1)}_prime', states[i+1])
-        test_expression &= test_bdd.add_expr(fr'{next_state}')
-        model_count = test_bdd.count(test_expression)
-        if model_count == 0:
-            return False
-    return True
+# Checks the paths against the transition relation of create_bdd
+def check_path(bdd, result, paths, vertices):
+    return report_paths(TransitionSystem(bdd, result, vertices), paths)
 
 
 # Main method
@@ -181,6 +131,23 @@ if __name__ == '__main__':
      # Specify the directory containing DIMACS graph files
     dir_str = "./data/p3_data/"
 
+    # Dynamic reordering and forced sifts during construction, e.g. ReorderConfig(dynamic=False, sift_at_end=True)
+    reordering = ReorderConfig()
+    # Also print the forward and backward reachable states of vertex 1
+    reachability = False
+    # Keep the relation as clusters of source vertices instead of one BDD, for graphs with many vertices.
+    # cluster_bits: leading source bits per cluster (None: up to 256 sources per cluster),
+    # partition_schedule: linear, balanced or smallest
+    partitioned = False
+    cluster_bits = None
+    partition_schedule = "balanced"
+    # Phase timers and CUDD snapshots as JSON lines appended to events_path (None: off), a snapshot every
+    # snapshot_every source vertices, and a cProfile dump per input file in profile_dir (None: off)
+    events_path = None
+    snapshot_every = 1000
+    profile_dir = None
+    instrumentation = from_settings("problem3", events_path, snapshot_every, profile_dir)
+
     # Get a list of files in the directory
     directory = os.fsencode(dir_str)
 
@@ -189,12 +156,29 @@ if __name__ == '__main__':
 
         # Initialize the BDD manager
         filename = os.fsdecode(file)
+        # skip hidden entries, only the input files are parsed
+        if filename.startswith('.'):
+            continue
         print(filename)
 
-        # if (filename=="gcd.col"):        
-        # Parse the DIMACS file and create the graph
-        graph, paths = parse_dimacs(f"{dir_str}{filename}")
-
-        bdd, result = create_bdd(graph)
-        passes = check_path(bdd, result, paths)
-        print(f"{passes} of the {len(paths)} have a possible trace in the graph")
+        with input_file(instrumentation, filename):
+            # if (filename=="gcd.col"):        
+            # Parse the DIMACS file and create the graph
+            with phase(instrumentation, 'parse'):
+                graph, paths = parse_dimacs(f"{dir_str}{filename}")
+
+            if partitioned:
+                bdd, partitions, bits = create_partitions(graph, cluster_bits, reordering, instrumentation)
+                system = PartitionedTransitionSystem(bdd, partitions, graph.V, bits, partition_schedule)
+            else:
+                bdd, result = create_bdd(graph, reordering, instrumentation)
+                system = TransitionSystem(bdd, result, graph.V)
+            with phase(instrumentation, 'paths', bdd):
+                passes = report_paths(system, paths)
+            print(f"{passes} of the {len(paths)} have a possible trace in the graph")
+            if reachability:
+                with phase(instrumentation, 'reachability', bdd):
+                    forward, iterations = system.forward_reachable(system.state(0))
+                    print(f"Reachable from vertex 1: {len(system.vertices_of(forward))} vertices, {iterations} images")
+                    backward, iterations = system.backward_reachable(system.state(0))
+                    print(f"Reaching vertex 1: {len(system.vertices_of(backward))} vertices, {iterations} preimages")
@@ -0,0 +1,189 @@
+import heapq
+
+from dd.cudd import and_exists
+
+from bdd_clauses import bits_cube, disjunction
+
+# Symbolic reachability on a transition relation T(x, x') over the state bits x_i and their primed copies
+# x_i_prime (problem3.create_bdd). Vertex v (0-based) is the state with color number v in the bits, the
+# first bit is the most significant one, the same encoding as bdd_clauses.bits_cube.
+#   image(S)     = rename(exists x. S(x) & T(x, x')), the successors of the states in S
+#   preimage(S)  = exists x'. T(x, x') & S(x'), the predecessors of the states in S
+# Both are one relational product (and_exists), so the conjunction never builds T & S in full.
+# A path step u -> v holds when T evaluates to true at the point (u, v): one substitution of all bits,
+# no conjunction and no model count. Steps are memoized, so checking many paths costs about linear time
+# in the total path length.
+
+#
+# PartitionedTransitionSystem keeps T as clusters of source vertices that share their first cluster_bits bits
+# (problem3.create_partitions), T = OR over prefixes p of (x_0..x_{c-1} = p) & R_p(x_c.., x'). The whole
+# relation is never built. An image restricts S to the prefix of a cluster first, which quantifies the
+# prefix bits away early, and then takes the relational product with R_p over the remaining bits only.
+# Clusters that S does not reach are skipped. The schedule says how the partial images are joined:
+#   linear:   one after the other in prefix order
+#   balanced: pairwise tree, as bdd_clauses.disjunction
+#   smallest: priority queue, always join the two smallest partial images
+
+SCHEDULES = ['linear', 'balanced', 'smallest']
+
+
+def state_bits(bits):
+    return [f'x_{i}' for i in range(bits)], [f'x_{i}_prime' for i in range(bits)]
+
+
+class TransitionSystem:
+    def __init__(self, bdd, relation, vertices):
+        self.bdd = bdd
+        self.relation = relation
+        self.V = vertices
+        self.current, self.primed = state_bits((vertices - 1).bit_length())
+        self.to_current = dict(zip(self.primed, self.current))
+        self.to_primed = dict(zip(self.current, self.primed))
+        self.steps = {}
+
+    # The state of vertex v as a cube, on the primed bits when primed is set
+    def state(self, v, primed=False):
+        return bits_cube(self.bdd, self.primed if primed else self.current, v)
+
+    # Every valid state, the vertices 0..V-1
+    def states(self):
+        u = self.bdd.false
+        for v in range(self.V):
+            u |= self.state(v)
+        return u
+
+    # Value of u at a point, a graph with one vertex has no bits to substitute
+    def evaluate(self, point, u):
+        return (self.bdd.let(point, u) if point else u) == self.bdd.true
+
+    def assignment(self, v, names):
+        width = len(names)
+        return {name: bool((v >> (width - 1 - i)) & 1) for i, name in enumerate(names)}
+
+    def image(self, states):
+        successors = and_exists(states, self.relation, self.current)
+        return self.bdd.let(self.to_current, successors) if self.current else successors
+
+    def preimage(self, states):
+        if not self.primed:
+            return self.relation & states
+        return and_exists(self.relation, self.bdd.let(self.to_primed, states), self.primed)
+
+    # Least fixpoint of step from start, returns the reached states and the number of iterations
+    def fixpoint(self, start, step):
+        reached = start
+        frontier = start
+        iterations = 0
+        while frontier != self.bdd.false:
+            iterations += 1
+            new = step(frontier) & ~reached
+            reached |= new
+            frontier = new
+        return reached, iterations
+
+    # States reachable from the states in start (start included)
+    def forward_reachable(self, start):
+        return self.fixpoint(start, self.image)
+
+    # States from which a state in target is reachable (target included)
+    def backward_reachable(self, target):
+        return self.fixpoint(target, self.preimage)
+
+    # Vertices in a BDD of states
+    def vertices_of(self, states):
+        return [v for v in range(self.V) if self.evaluate(self.assignment(v, self.current), states)]
+
+    # Whether the edge u -> v is in the relation
+    def step(self, u, v):
+        key = (u, v)
+        if key not in self.steps:
+            point = self.assignment(u, self.current)
+            point.update(self.assignment(v, self.primed))
+            self.steps[key] = self.evaluate(point, self.relation)
+        return self.steps[key]
+
+    # Whether a path of 1-based vertices can be taken in the graph
+    def check_path(self, path):
+        if any(not 1 <= v <= self.V for v in path):
+            return False
+        return all(self.step(u - 1, v - 1) for u, v in zip(path, path[1:]))
+
+    def check_paths(self, paths):
+        return [self.check_path(path) for path in paths]
+
+
+def join_linear(bdd, parts):
+    result = bdd.false
+    for u in parts:
+        result |= u
+    return result
+
+
+def join_smallest(bdd, parts):
+    heap = [(len(u), i, u) for i, u in enumerate(parts)]
+    if not heap:
+        return bdd.false
+    heapq.heapify(heap)
+    counter = len(heap)
+    while len(heap) > 1:
+        _, _, u = heapq.heappop(heap)
+        _, _, v = heapq.heappop(heap)
+        w = u | v
+        heapq.heappush(heap, (len(w), counter, w))
+        counter += 1
+    return heap[0][2]
+
+
+JOINS = {
+    'linear': join_linear,
+    'balanced': disjunction,
+    'smallest': join_smallest,
+}
+
+
+class PartitionedTransitionSystem(TransitionSystem):
+    def __init__(self, bdd, partitions, vertices, cluster_bits, schedule='balanced'):
+        if schedule not in JOINS:
+            raise ValueError(f"Unknown partition schedule '{schedule}', choose one of {SCHEDULES}")
+        super().__init__(bdd, None, vertices)
+        self.partitions = partitions
+        self.cluster_bits = cluster_bits
+        self.shift = len(self.current) - cluster_bits
+        self.prefix_bits = self.current[:cluster_bits]
+        self.low_bits = self.current[cluster_bits:]
+        self.join = JOINS[schedule]
+
+    def restrict(self, prefix, states):
+        if not self.prefix_bits:
+            return states
+        return self.bdd.let(self.assignment(prefix, self.prefix_bits), states)
+
+    def image(self, states):
+        parts = []
+        for prefix, relation in self.partitions.items():
+            restricted = self.restrict(prefix, states)
+            if restricted != self.bdd.false:
+                parts.append(and_exists(restricted, relation, self.low_bits))
+        successors = self.join(self.bdd, parts)
+        return self.bdd.let(self.to_current, successors) if self.current else successors
+
+    def preimage(self, states):
+        targets = self.bdd.let(self.to_primed, states) if self.primed else states
+        parts = []
+        for prefix, relation in self.partitions.items():
+            sources = and_exists(relation, targets, self.primed) if self.primed else relation & targets
+            if sources != self.bdd.false:
+                parts.append(bits_cube(self.bdd, self.prefix_bits, prefix) & sources)
+        return self.join(self.bdd, parts)
+
+    def step(self, u, v):
+        key = (u, v)
+        if key not in self.steps:
+            relation = self.partitions.get(u >> self.shift)
+            if relation is None:
+                self.steps[key] = False
+            else:
+                point = self.assignment(u & ((1 << len(self.low_bits)) - 1), self.low_bits)
+                point.update(self.assignment(v, self.primed))
+                self.steps[key] = self.evaluate(point, relation)
+        return self.steps[key]
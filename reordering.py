@@ -0,0 +1,113 @@
+from time import time
+
+from instrumentation import cudd_statistics
+
+# Reordering control shared by the BDD builders.
+# A ReorderConfig decides whether CUDD reorders dynamically while the clauses are conjoined, forces a sift
+# every N conjunctions and/or at the end, and groups variables (like the color bits of a vertex) so that
+# sifting moves them together. Every forced reorder logs the node count of the manager before and after.
+# dd only exposes CUDD's group sifting, so 'sift' honours the groups set with group_blocks.
+# CUDD's own dynamic reorders are logged too, from its reordering counter. Reading the counter costs about
+# 1.5 ms (bdd.statistics walks the whole cache), so it is only read after a conjunction that took longer than
+# poll_after seconds, which every expensive reorder does, and at the end of construction. A dynamic entry
+# holds the reorders since the previous read, with the node count at that read as the count before.
+
+
+# (number of reorderings, seconds spent reordering) of a manager so far, forced and dynamic
+def reorder_stats(bdd):
+    stats = cudd_statistics(bdd)
+    return stats['n_reorderings'], stats['reordering_time']
+
+
+class ReorderConfig:
+    def __init__(self, dynamic=None, sift_every=None, sift_at_end=False, group=True, max_growth=None,
+                 verbose=True, poll_after=0.01):
+        # None keeps CUDD's default for dynamic reordering, True/False switch it on/off
+        self.dynamic = dynamic
+        self.sift_every = sift_every
+        self.sift_at_end = sift_at_end
+        self.group = group
+        self.max_growth = max_growth
+        self.verbose = verbose
+        self.poll_after = poll_after
+        self.steps = 0
+        self.log = []
+        # reorderings, reordering seconds and node count of the manager at the last read, see poll
+        self.reorderings = 0
+        self.reordering_time = 0.0
+        self.nodes = 0
+        self.last_step = time()
+
+    # Applies the settings to a fresh manager. The steps and the log are per build, the scripts reuse one
+    # config for every input file.
+    def setup(self, bdd):
+        self.steps = 0
+        self.log = []
+        settings = {}
+        if self.dynamic is not None:
+            settings['reordering'] = self.dynamic
+        if self.max_growth is not None:
+            settings['max_growth'] = self.max_growth
+        if settings:
+            bdd.configure(**settings)
+        self.observe(bdd)
+        self.last_step = time()
+
+    def observe(self, bdd):
+        self.reorderings, self.reordering_time = reorder_stats(bdd)
+        self.nodes = len(bdd)
+
+    # A log entry is (reason, nodes before, nodes after, seconds, number of reorders)
+    def record(self, reason, before, after, seconds, reorders=1):
+        self.log.append((reason, before, after, seconds, reorders))
+        if self.verbose:
+            print(f'reorder ({reason}): {before} -> {after} nodes in {seconds:.3f} s'
+                  + (f' ({reorders} reorders)' if reorders > 1 else ''))
+
+    # Logs the dynamic reorders CUDD made since the last read of its counter
+    def poll(self, bdd, reason):
+        reorderings, seconds = reorder_stats(bdd)
+        if reorderings > self.reorderings:
+            self.record(f'dynamic, {reason}', self.nodes, len(bdd), seconds - self.reordering_time,
+                        reorderings - self.reorderings)
+        self.observe(bdd)
+
+    # Couples every block of variables, the variables of a block must be declared at adjacent levels
+    def group_blocks(self, bdd, blocks):
+        if not self.group:
+            return
+        groups = {}
+        for block in blocks:
+            if len(block) > 1:
+                groups[min(block, key=bdd.level_of_var)] = len(block)
+        if groups:
+            bdd.group(groups)
+
+    # Sifts the manager once and logs the node counts
+    def sift(self, bdd, reason):
+        before = len(bdd)
+        start = time()
+        bdd.reorder()
+        seconds = time() - start
+        self.record(reason, before, len(bdd), seconds)
+        self.observe(bdd)
+
+    # Called after every conjunction of the builder
+    def step(self, bdd):
+        self.steps += 1
+        # only a slow conjunction can have triggered an expensive dynamic reorder
+        if self.dynamic is not False and time() - self.last_step > self.poll_after:
+            self.poll(bdd, f'by conjunction {self.steps}')
+        if self.sift_every and self.steps % self.sift_every == 0:
+            self.sift(bdd, f'after {self.steps} conjunctions')
+        self.last_step = time()
+
+    def finish(self, bdd):
+        if self.dynamic is not False:
+            self.poll(bdd, 'by the end of construction')
+        if self.sift_at_end:
+            self.sift(bdd, 'end of construction')
+
+    # Number of reorders in the log, a dynamic entry can stand for several
+    def reorder_count(self):
+        return sum(reorders for _, _, _, _, reorders in self.log)
@@ -0,0 +1,79 @@
+import numpy as np
+
+from model_counting import cofactors, node_counts, node_level, postorder
+
+# Uniform random sampling of the models of a BDD, e.g. valid configurations of a feature model.
+# The nodes are annotated once with their model counts (model_counting.node_counts). A sample walks down from
+# the root and takes the high edge of a node with probability models(high side) / models(node), so every
+# model is drawn with the same probability. A variable that the path skips is free and a fair coin.
+# A batch walks all of its samples down at once, one level per step, in NumPy arrays: O(samples * variables).
+# The edge probabilities are the exact counts rounded to float64.
+# Variables are named prefix + number as in problem2 (x1..xn), a sample is written as a line of signed
+# literals ending in 0, the format of problem2.convert_to_dimacs.
+
+
+class Sampler:
+    def __init__(self, bdd, u, seed=None, prefix='x'):
+        if u == bdd.false:
+            raise ValueError("The BDD has no models to sample")
+        levels = {bdd.level_of_var(var): var for var in bdd.vars}
+        self.nvars = len(levels)
+        self.numbers = np.array([int(levels[level][len(prefix):]) for level in range(self.nvars)])
+        self.rng = np.random.default_rng(seed)
+
+        nodes = postorder(bdd, u)
+        count = node_counts(bdd, nodes, self.nvars)
+        # the nodes as arrays, the terminals have the level nvars and point to themselves
+        index = {int(node): i for i, node in enumerate(nodes)}
+        self.level = np.empty(len(nodes), dtype=np.int64)
+        self.low = np.empty(len(nodes), dtype=np.int64)
+        self.high = np.empty(len(nodes), dtype=np.int64)
+        self.p_high = np.zeros(len(nodes))
+        for i, node in enumerate(nodes):
+            self.level[i] = node_level(node, self.nvars)
+            if node.var is None:
+                self.low[i] = self.high[i] = i
+                continue
+            low, high = cofactors(node)
+            self.low[i] = index[int(low)]
+            self.high[i] = index[int(high)]
+            low_models = count[int(low)] << (node_level(low, self.nvars) - node.level - 1)
+            high_models = count[int(high)] << (node_level(high, self.nvars) - node.level - 1)
+            self.p_high[i] = (high_models << 64) // (low_models + high_models) / 2.0 ** 64
+        self.root = index[int(u)]
+        self.models = count[int(u)] << node_level(u, self.nvars)
+
+    # Draws n samples, returns an (n, variables) boolean array, column l holds the variable at level l
+    def sample(self, n):
+        values = np.empty((n, self.nvars), dtype=bool)
+        current = np.full(n, self.root, dtype=np.int64)
+        for level in range(self.nvars):
+            coin = self.rng.random(n)
+            here = self.level[current] == level
+            # a node at this level decides with its edge probability, a skipped variable is a fair coin
+            values[:, level] = np.where(here, coin < self.p_high[current], coin < 0.5)
+            current = np.where(here, np.where(values[:, level], self.high[current], self.low[current]), current)
+        return values
+
+    # Signed literals of the samples in variable number order, one row per sample
+    def literals(self, values):
+        order = np.argsort(self.numbers)
+        return np.where(values[:, order], self.numbers[order], -self.numbers[order])
+
+    # Writes n samples to out, one line per sample, in batches of batch_size samples
+    def write(self, out, n, batch_size=10000):
+        # the text of both literals of every variable is made once, a line only joins them
+        order = np.argsort(self.numbers)
+        positive = np.array([f'{number} ' for number in self.numbers[order]], dtype=object)
+        negative = np.array([f'-{number} ' for number in self.numbers[order]], dtype=object)
+        for start in range(0, n, batch_size):
+            rows = np.where(self.sample(min(batch_size, n - start))[:, order], positive, negative)
+            out.write(''.join(''.join(row) + '0\n' for row in rows.tolist()))
+
+
+# Writes n uniform samples of the models of u to path
+def write_samples(bdd, u, path, n, seed=None, batch_size=10000):
+    sampler = Sampler(bdd, u, seed)
+    with open(path, 'w') as out:
+        sampler.write(out, n, batch_size)
+    return sampler
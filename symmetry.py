@@ -0,0 +1,91 @@
+from bdd_clauses import bits_cube, less_than
+from coloring import CSRGraph, greedy_clique
+from ordering import graph_adjacency
+
+# Symmetry breaking for the coloring BDDs.
+# Every k-coloring comes with the colorings that only permute the colors, so a SymmetryBreaking adds
+# constraints that keep fewer of them and recovers the exact count afterwards:
+#   clique:     the vertices of a greedy clique get the colors 0..q-1, every coloring of the graph is
+#               such a coloring with the colors permuted in k * (k - 1) * ... * (k - q + 1) ways
+#   precedence: a vertex may only take color i > 0 when an earlier vertex has color i - 1, which keeps one
+#               coloring per partition into independent sets (the colorings up to relabeling).
+#               A partition into j sets stands for k * (k - 1) * ... * (k - j + 1) colorings.
+# The vertices are taken in the order of their variables, so the constraints stay local in the BDD.
+# blocks maps every vertex to its variable names: k colors (one_hot) or the bits of the color number (binary).
+
+METHODS = ['clique', 'precedence']
+
+
+def falling_factorial(k, j):
+    result = 1
+    for i in range(j):
+        result *= k - i
+    return result
+
+
+# The BDD of "vertex has color i"
+def has_color(bdd, names, i, encoding):
+    if encoding == 'one_hot':
+        return bdd.var(names[i])
+    return bits_cube(bdd, names, i)
+
+
+class SymmetryBreaking:
+    def __init__(self, method='clique'):
+        if method not in METHODS:
+            raise ValueError(f"Unknown symmetry breaking '{method}', choose one of {METHODS}")
+        self.method = method
+        self.clique = []
+
+    # Constraints to conjoin with the coloring clauses
+    def constraints(self, bdd, dimacs, blocks, color_nr, encoding):
+        if self.method == 'clique':
+            adjacency = graph_adjacency(dimacs)
+            self.clique = greedy_clique(CSRGraph(adjacency)) if blocks else []
+            if len(self.clique) > color_nr:
+                return [bdd.false]
+            return [has_color(bdd, blocks[v], i, encoding) for i, v in enumerate(self.clique)]
+
+        vertices = sorted(blocks, key=lambda v: min(bdd.level_of_var(var) for var in blocks[v]))
+        clauses = []
+        # used[i] says that one of the vertices so far has color i
+        used = [bdd.false] * color_nr
+        for v in vertices:
+            colors = [has_color(bdd, blocks[v], i, encoding) for i in range(color_nr)]
+            for i in range(1, color_nr):
+                clauses.append(~colors[i] | used[i - 1])
+            for i in range(color_nr):
+                used[i] |= colors[i]
+        return clauses
+
+    # Number of models of u, counted over the variables that are left for k colors
+    def models(self, bdd, u, blocks, k, encoding):
+        if encoding == 'one_hot':
+            return int(bdd.count(u, nvars=len(blocks) * k))
+        return int(bdd.count(u, nvars=len(bdd.vars)))
+
+    # Exact number of k-colorings from the BDD with the symmetry broken
+    def colorings(self, bdd, u, blocks, k, encoding):
+        if self.method == 'clique':
+            return self.models(bdd, u, blocks, k, encoding) * falling_factorial(k, len(self.clique))
+
+        # without vertices the only partition is the empty one, it has no sets to color
+        if not blocks:
+            return self.models(bdd, u, blocks, k, encoding)
+        # at_most[j] = partitions into at most j sets, those only use the colors 0..j-1
+        total = 0
+        previous = 0
+        for j in range(1, k + 1):
+            if j == k:
+                restricted = u
+            elif encoding == 'one_hot':
+                restricted = bdd.let({names[i]: False for names in blocks.values() for i in range(j, k)}, u)
+            else:
+                restricted = u
+                for names in blocks.values():
+                    restricted &= less_than(bdd, names, j)
+            # one-hot only counts the variables of the colors 0..j-1, the others are fixed to false
+            at_most = self.models(bdd, restricted, blocks, j, encoding)
+            total += (at_most - previous) * falling_factorial(k, j)
+            previous = at_most
+        return total
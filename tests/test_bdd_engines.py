@@ -0,0 +1,105 @@
+import random
+from collections import Counter
+from itertools import product
+
+from dd.cudd import BDD
+
+from backbone import backbone
+from model_counting import MarginalCounts, marginal_counts
+from sampling import Sampler
+
+# The BDD engines against brute force over every assignment of small random BDDs, also after sifting and
+# after a random variable order.
+
+NVARS = 6
+
+
+def random_bdd(rng):
+    bdd = BDD()
+    names = [f'x{i + 1}' for i in range(NVARS)]
+    for name in names:
+        bdd.add_var(name)
+    # a random set of models, sometimes with a few fixed literals so there is a backbone
+    fixed = {name: rng.random() < 0.5 for name in rng.sample(names, rng.randint(0, 2))}
+    u = bdd.false
+    for _ in range(rng.randint(0, 12)):
+        point = {name: rng.random() < 0.5 for name in names}
+        point.update(fixed)
+        # a cube over some of the variables, the others are free
+        u |= bdd.cube({name: value for name, value in point.items() if rng.random() < 0.7})
+    return bdd, u
+
+
+def models(bdd, u):
+    names = sorted(bdd.vars)
+    return [dict(zip(names, values)) for values in product([False, True], repeat=len(names))
+            if bdd.let(dict(zip(names, values)), u) == bdd.true]
+
+
+def reordered(rng, bdd):
+    # unchanged, sifted and shuffled
+    yield
+    bdd.reorder()
+    yield
+    names = list(bdd.vars)
+    rng.shuffle(names)
+    bdd.reorder({name: level for level, name in enumerate(names)})
+    yield
+
+
+def cases(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        bdd, u = random_bdd(rng)
+        for _ in reordered(rng, bdd):
+            yield bdd, u, models(bdd, u)
+
+
+def test_marginal_counts():
+    for bdd, u, points in cases(60, seed=1):
+        counts = marginal_counts(bdd, u)
+        for name in bdd.vars:
+            positive = sum(point[name] for point in points)
+            assert counts[name] == (len(points) - positive, positive)
+        counter = MarginalCounts(bdd, u)
+        for name in bdd.vars:
+            assert counter.get(name) == counts[name]
+
+
+def test_support():
+    for bdd, u, _ in cases(30, seed=4):
+        assert MarginalCounts(bdd, u).support() == bdd.support(u)
+
+
+def test_backbone():
+    for bdd, u, points in cases(60, seed=2):
+        expected = {name: points[0][name] for name in bdd.support(u) if len({p[name] for p in points}) == 1} \
+            if points else {}
+        assert backbone(bdd, u) == expected
+
+
+def test_sampler_is_uniform():
+    rng = random.Random(3)
+    for bdd, u, points in cases(20, seed=3):
+        if not points:
+            continue
+        sampler = Sampler(bdd, u, seed=rng.randrange(1 << 30))
+        assert sampler.models == len(points)
+        n = 400 * len(points)
+        names = [bdd.var_at_level(level) for level in range(NVARS)]
+        drawn = Counter(tuple(row) for row in sampler.sample(n).tolist())
+        for values in drawn:
+            assert bdd.let(dict(zip(names, values)), u) == bdd.true
+        # every model is drawn, about n / models times (a 30 % band is over 6 standard deviations)
+        assert len(drawn) == len(points)
+        for times in drawn.values():
+            assert abs(times - 400) < 120
+
+
+def test_sampler_literals():
+    bdd = BDD()
+    bdd.declare('x1', 'x2', 'x3')
+    u = bdd.add_expr('x1 /\\ ~ x3')
+    sampler = Sampler(bdd, u, seed=0)
+    for row in sampler.literals(sampler.sample(50)).tolist():
+        assert row[0] == 1 and row[2] == -3 and abs(row[1]) == 2
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+import dimacs_cache
+from bdd_approach import create_bdd, create_bit_encoded_bdd, split_var, sweep_colors
+from chromatic import chromatic_polynomial, evaluate
+from symmetry import METHODS, SymmetryBreaking
+
+# The coloring BDDs in both encodings against the chromatic polynomial (itself checked against brute force in
+# test_counting) on small random graphs. Only the vertices on an edge get variables, every other vertex adds
+# a factor k.
+
+BUILDS = {'one_hot': create_bdd, 'binary': create_bit_encoded_bdd}
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # keep the parse cache of the temporary inputs out of the repository
+    monkeypatch.setattr(dimacs_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+
+# Random graphs (with duplicate edges) as .col files, yields (path, adjacency, number of vertices on an edge)
+def graphs(tmp_path, count=60, seed=1):
+    rng = random.Random(seed)
+    for i in range(count):
+        n = rng.randint(1, 6)
+        density = rng.random()
+        edges = [(u, v) for u in range(n) for v in range(u + 1, n) if rng.random() < density]
+        edges += rng.sample(edges, min(len(edges), rng.randint(0, 2)))
+        adjacency = [[] for _ in range(n)]
+        for u, v in edges:
+            adjacency[u].append(v)
+            adjacency[v].append(u)
+        path = tmp_path / f'graph{i}.col'
+        path.write_text(f'p edge {n} {len(edges)}\n' + ''.join(f'e {u + 1} {v + 1}\n' for u, v in edges))
+        yield str(path), adjacency, len({w for edge in edges for w in edge})
+
+
+# {vertex: variable names by color (one-hot) or by bit (binary)}, as the builders pass them to symmetry
+def blocks_of(bdd):
+    blocks = {}
+    for var in bdd.vars:
+        block, index = split_var(var)
+        blocks.setdefault(int(block[2:]) - 1, []).append((index, var))
+    return {vertex: [var for _, var in sorted(names)] for vertex, names in blocks.items()}
+
+
+def test_builders_count_colorings(tmp_path):
+    for f, adjacency, covered in graphs(tmp_path):
+        polynomial = chromatic_polynomial(adjacency)
+        for encoding, build in BUILDS.items():
+            for k in range(1, 6):
+                bdd, u = build(f, k)
+                models = int(bdd.count(u, nvars=len(bdd.vars)))
+                assert models * k ** (len(adjacency) - covered) == evaluate(polynomial, k), (f, encoding, k)
+
+
+def test_sweep_colors(tmp_path):
+    for f, adjacency, covered in graphs(tmp_path, 30, seed=2):
+        polynomial = chromatic_polynomial(adjacency)
+        for encoding in BUILDS:
+            counts = sweep_colors(f, 5, 1, encoding)
+            for k, (_, models) in counts.items():
+                assert models * k ** (len(adjacency) - covered) == evaluate(polynomial, k), (f, encoding, k)
+            # the sweep goes down to k_min or stops at the first k without colorings
+            assert min(counts) == 1 or counts[min(counts)][1] == 0
+
+
+def test_symmetry_breaking(tmp_path):
+    for f, adjacency, covered in graphs(tmp_path, 40, seed=3):
+        polynomial = chromatic_polynomial(adjacency)
+        for encoding, build in BUILDS.items():
+            for method in METHODS:
+                for k in range(1, 6):
+                    symmetry = SymmetryBreaking(method)
+                    bdd, u = build(f, k, symmetry=symmetry)
+                    colorings = symmetry.colorings(bdd, u, blocks_of(bdd), k, encoding)
+                    assert colorings * k ** (len(adjacency) - covered) == evaluate(polynomial, k), \
+                        (f, encoding, method, k)
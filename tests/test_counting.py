@@ -0,0 +1,87 @@
+import random
+from itertools import product
+
+import pytest
+
+from bitset_counter import count_k_colorings as bitset_count
+from chromatic import chromatic_number, chromatic_polynomial, evaluate
+from tree_decomposition import count_k_colorings as treewidth_count, tree_decomposition
+
+# The k-coloring counters against brute force on small random graphs (duplicate edges, isolated vertices and
+# self loops included) and on two graphs with known counts.
+
+
+def random_graph(rng, n, density, loops=False):
+    adjacency = [[] for _ in range(n)]
+    for u in range(n):
+        for v in range(u if loops else u + 1, n):
+            if rng.random() < density:
+                adjacency[u].append(v)
+                adjacency[v].append(u)
+                if rng.random() < 0.1:
+                    adjacency[u].append(v)
+                    adjacency[v].append(u)
+    return adjacency
+
+
+def brute_force(adjacency, k):
+    edges = [(u, v) for u, neighbors in enumerate(adjacency) for v in neighbors]
+    return sum(all(colors[u] != colors[v] for u, v in edges) for colors in product(range(k), repeat=len(adjacency)))
+
+
+def graphs(count=80, seed=1):
+    rng = random.Random(seed)
+    for i in range(count):
+        n = rng.randint(0, 6)
+        yield random_graph(rng, n, rng.random(), loops=i % 10 == 0)
+
+
+# (adjacency, k, number of k-colorings)
+def cases():
+    for adjacency in graphs():
+        for k in range(5):
+            yield adjacency, k, brute_force(adjacency, k)
+    # a cycle of 5 vertices has (k - 1)^5 - (k - 1) colorings, the Petersen graph has 120 with k = 3
+    cycle = [[(v - 1) % 5, (v + 1) % 5] for v in range(5)]
+    for k in range(6):
+        yield cycle, k, (k - 1) ** 5 - (k - 1)
+    petersen = [[] for _ in range(10)]
+    for u, v in [(i, (i + 1) % 5) for i in range(5)] + [(i, i + 5) for i in range(5)] + \
+            [(5 + i, 5 + (i + 2) % 5) for i in range(5)]:
+        petersen[u].append(v)
+        petersen[v].append(u)
+    yield petersen, 3, 120
+
+
+def test_chromatic_polynomial():
+    for adjacency, k, expected in cases():
+        assert evaluate(chromatic_polynomial(adjacency), k) == expected, (adjacency, k)
+
+
+def test_chromatic_number():
+    for adjacency in graphs(40, seed=2):
+        polynomial = chromatic_polynomial(adjacency)
+        if polynomial == [0]:
+            continue
+        expected = next(k for k in range(len(adjacency) + 1) if brute_force(adjacency, k) > 0)
+        assert chromatic_number(polynomial, len(adjacency)) == expected
+
+
+def test_tree_decomposition_count():
+    for adjacency, k, expected in cases():
+        assert treewidth_count(adjacency, k) == expected, (adjacency, k)
+
+
+def test_treewidth_table_cap():
+    clique = [[v for v in range(8) if v != u] for u in range(8)]
+    decomposition = tree_decomposition(clique)
+    assert decomposition.width() == 7
+    assert decomposition.table_size(8) == 8 ** 8
+    with pytest.raises(ValueError):
+        treewidth_count(clique, 8, decomposition, max_table=8 ** 8 - 1)
+    assert treewidth_count(clique, 8, decomposition) == 40320
+
+
+def test_bitset_count():
+    for adjacency, k, expected in cases():
+        assert bitset_count(adjacency, k) == expected, (adjacency, k)
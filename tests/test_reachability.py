@@ -0,0 +1,73 @@
+import random
+from collections import deque
+
+from problem3 import Graph, create_bdd, create_partitions
+from reachability import SCHEDULES, PartitionedTransitionSystem, TransitionSystem
+
+# The transition systems against the edge lists and BFS on small random digraphs, the partitioned one for
+# every cluster width and join schedule.
+
+
+def random_digraph(rng, n):
+    graph = Graph(n)
+    density = rng.random()
+    for u in range(n):
+        for v in range(n):
+            if rng.random() < density * 0.5:
+                graph.add_edge(u, v)
+    return graph
+
+
+def bfs(adjacency, start):
+    seen = set(start)
+    queue = deque(start)
+    while queue:
+        u = queue.popleft()
+        for v in adjacency[u]:
+            if v not in seen:
+                seen.add(v)
+                queue.append(v)
+    return sorted(seen)
+
+
+def systems(graph):
+    bdd, relation = create_bdd(graph)
+    yield TransitionSystem(bdd, relation, graph.V)
+    for cluster_bits in range((graph.V - 1).bit_length() + 1):
+        for schedule in SCHEDULES:
+            bdd, partitions, bits = create_partitions(graph, cluster_bits)
+            yield PartitionedTransitionSystem(bdd, partitions, graph.V, bits, schedule)
+
+
+def test_transition_systems_match_bfs():
+    rng = random.Random(1)
+    for _ in range(40):
+        graph = random_digraph(rng, rng.randint(1, 11))
+        edges = {(u, v) for u in range(graph.V) for v in graph.graph[u]}
+        reverse = [[u for u in range(graph.V) if (u, v) in edges] for v in range(graph.V)]
+        start = rng.sample(range(graph.V), rng.randint(1, min(3, graph.V)))
+        for system in systems(graph):
+            assert all(system.step(u, v) == ((u, v) in edges) for u in range(graph.V) for v in range(graph.V))
+            sources = system.bdd.false
+            for v in start:
+                sources |= system.state(v)
+            assert system.vertices_of(system.image(sources)) == \
+                sorted({v for u in start for v in graph.graph[u]})
+            assert system.vertices_of(system.preimage(sources)) == sorted({u for v in start for u in reverse[v]})
+            forward, _ = system.forward_reachable(sources)
+            assert system.vertices_of(forward) == bfs(graph.graph, start)
+            backward, _ = system.backward_reachable(sources)
+            assert system.vertices_of(backward) == bfs(reverse, start)
+
+
+def test_check_paths():
+    rng = random.Random(2)
+    for _ in range(30):
+        graph = random_digraph(rng, rng.randint(1, 9))
+        edges = {(u, v) for u in range(graph.V) for v in graph.graph[u]}
+        # 1-based paths, some of them leave the graph
+        paths = [[rng.randint(1, graph.V + 1) for _ in range(rng.randint(1, 5))] for _ in range(10)]
+        expected = [all(1 <= v <= graph.V for v in path) and
+                    all((u - 1, v - 1) in edges for u, v in zip(path, path[1:])) for path in paths]
+        for system in systems(graph):
+            assert system.check_paths(paths) == expected
@@ -0,0 +1,128 @@
+import numpy as np
+
+from chromatic import clean_adjacency
+from ordering import elimination_order
+
+# Counting k-colorings by dynamic programming over a tree decomposition.
+# The decomposition comes from an elimination order (min_fill or min_degree): the bag of a vertex v holds v and
+# its neighbours at the moment it is eliminated, and its parent is the bag of the first of those neighbours
+# to be eliminated after v. Bags are handled in elimination order, so every child comes before its parent.
+# Every bag gets a NumPy table indexed by the colors of its vertices (axis i = color of bag[i]). Summing out v
+# leaves a message over the rest of the bag, which is a subset of the parent bag.
+# The tables hold int64 counts modulo primes below 2^31 (a product of two entries still fits in int64), the
+# exact count is put together from the residues with the Chinese remainder theorem.
+# The table of the widest bag has k^(width + 1) entries, a decomposition whose table would exceed max_table
+# entries raises a ValueError before anything is allocated (the small-dimacs graphs have width 22-28).
+
+HEURISTICS = ['min_fill', 'min_degree']
+# Largest table in entries, 2^25 int64 entries are 256 MB
+MAX_TABLE = 1 << 25
+
+
+class TreeDecomposition:
+    def __init__(self, order, bags, parent):
+        # bags[i] is the bag of the vertex order[i], bags[i][0] == order[i]
+        self.order = order
+        self.bags = bags
+        self.parent = parent
+
+    def width(self):
+        return max((len(bag) for bag in self.bags), default=1) - 1
+
+    # Entries of the largest table for k colors
+    def table_size(self, k):
+        return k ** (self.width() + 1)
+
+
+def tree_decomposition(adjacency, heuristic='min_fill'):
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown elimination heuristic '{heuristic}', choose one of {HEURISTICS}")
+    order = elimination_order(adjacency, heuristic)
+    position = {v: i for i, v in enumerate(order)}
+    neighbors = [set(nbrs) for nbrs in adjacency]
+    bags = []
+    parent = []
+    for v in order:
+        later = sorted(neighbors[v], key=position.get)
+        bags.append([v] + later)
+        parent.append(position[later[0]] if later else None)
+        for a in later:
+            neighbors[a].discard(v)
+            neighbors[a].update(b for b in later if b != a)
+    return TreeDecomposition(order, bags, parent)
+
+
+def primes_below(bound, count):
+    primes = []
+    candidate = bound - 1
+    while len(primes) < count:
+        if candidate % 2 and all(candidate % d for d in range(3, int(candidate ** 0.5) + 1, 2)):
+            primes.append(candidate)
+        candidate -= 1
+    return primes
+
+
+# Reshapes a message over scope so that it broadcasts against a table over bag
+def align(message, scope, bag):
+    axes = [bag.index(w) for w in scope]
+    shape = [1] * len(bag)
+    for w, axis in zip(scope, axes):
+        shape[axis] = message.shape[scope.index(w)]
+    # put the axes of the message in bag order before adding the missing ones
+    permutation = sorted(range(len(scope)), key=lambda i: axes[i])
+    return message.transpose(permutation).reshape(shape)
+
+
+# Number of k-colorings modulo p
+def count_modulo(adjacency, k, decomposition, p):
+    different = np.ones((k, k), dtype=np.int64) - np.eye(k, dtype=np.int64)
+    messages = [[] for _ in decomposition.bags]
+    result = 1
+    for i, bag in enumerate(decomposition.bags):
+        v = bag[0]
+        table = np.ones((k,) * len(bag), dtype=np.int64)
+        # v and a neighbour in the bag get different colors
+        for axis, w in enumerate(bag[1:], start=1):
+            if w in adjacency[v]:
+                shape = [1] * len(bag)
+                shape[0] = shape[axis] = k
+                table *= different.reshape(shape)
+        for scope, message in messages[i]:
+            # in place, the tables are the largest arrays of the run
+            table *= align(message, scope, bag)
+            np.remainder(table, p, out=table)
+        message = table.sum(axis=0) % p
+        if decomposition.parent[i] is None:
+            # root of a connected component
+            result = result * int(message) % p
+        else:
+            messages[decomposition.parent[i]].append((bag[1:], message))
+    return result
+
+
+# Exact number of k-colorings, as a drop-in for total_naive_k_colorings
+def count_k_colorings(adjacency, k, decomposition=None, heuristic='min_fill', max_table=MAX_TABLE):
+    adjacency = clean_adjacency(adjacency)
+    n = len(adjacency)
+    if any(v in neighbors for v, neighbors in enumerate(adjacency)):
+        # a self loop can never be colored
+        return 0
+    if k <= 0:
+        return 1 if n == 0 else 0
+    if decomposition is None:
+        decomposition = tree_decomposition(adjacency, heuristic)
+    if decomposition.table_size(k) > max_table:
+        raise ValueError(f"A tree decomposition of width {decomposition.width()} needs tables of "
+                         f"{k}^{decomposition.width() + 1} entries for k = {k}, more than {max_table}")
+    adjacency = [set(neighbors) for neighbors in adjacency]
+
+    # enough primes for their product to exceed k^n, the largest possible count
+    primes = primes_below(1 << 31, (k ** n).bit_length() // 30 + 1)
+    count, modulus = 0, 1
+    for p in primes:
+        residue = count_modulo(adjacency, k, decomposition, p)
+        # combine count mod modulus and residue mod p into one count mod modulus * p
+        step = (residue - count) * pow(modulus, -1, p) % p
+        count += modulus * step
+        modulus *= p
+    return count